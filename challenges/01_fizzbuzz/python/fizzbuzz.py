@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """FizzBuzz - Python 実装"""
 
+import sys
 from typing import Iterator, List
 
 print("=== FizzBuzz Demo ===\n")
@@ -25,6 +26,36 @@ fizzbuzz_basic(15)
 
 print()
 
+# --- ルックアップテーブル ---
+print("--- Lookup Table ---")
+
+# FizzBuzz は周期 15 なので i % 15 で引ける (None は数値をそのまま出力)
+_LUT = (
+    "FizzBuzz", None, None, "Fizz", None,
+    "Buzz", "Fizz", None, None, "Fizz",
+    "Buzz", None, "Fizz", None, None,
+)
+
+
+def fizzbuzz_lut(n: int) -> List[str]:
+    # 剰余 1 回 + 表引き 1 回。分岐は予測しやすい None 判定だけ
+    # 結果は事前確保したリストに添字で書き込む
+    buf: List[str] = [""] * n
+    for i in range(1, n + 1):
+        s = _LUT[i % 15]
+        buf[i - 1] = str(i) if s is None else s
+    return buf
+
+
+def fizzbuzz_output(n: int) -> str:
+    # 1 行ずつ print せず出力全体を 1 つの文字列にまとめ、write を 1 回で済ませる
+    return "\n".join(fizzbuzz_lut(n)) + "\n"
+
+
+sys.stdout.write(fizzbuzz_output(15))
+
+print()
+
 # --- match 文 (Python 3.10+) ---
 print("--- Match Expression (Python 3.10+) ---")
 
@@ -137,6 +168,77 @@ print(", ".join(result))
 
 print()
 
+# --- NumPy ベクトル化 ---
+print("--- NumPy Vectorized ---")
+
+# NumPy はオプション依存。無ければ純 Python 版にフォールバックする
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# これ未満の n では NumPy の呼び出しオーバーヘッドの方が大きい
+NUMPY_THRESHOLD = 1024
+
+
+def fizzbuzz_numpy(n: int) -> List[str]:
+    if np is None or n < NUMPY_THRESHOLD:
+        return fizzbuzz_functional(n)
+
+    # 剰余とマスク代入はすべて NumPy の C ループで処理される
+    ids = np.arange(1, n + 1)
+    m3 = (ids % 3) == 0
+    m5 = (ids % 5) == 0
+    out = ids.astype(str)
+    out[m3] = "Fizz"
+    out[m5] = "Buzz"
+    out[m3 & m5] = "FizzBuzz"
+    return out.tolist()
+
+
+print(f"NumPy available: {np is not None}")
+print(", ".join(fizzbuzz_numpy(15)))
+assert fizzbuzz_numpy(3000) == fizzbuzz_functional(3000)
+
+print()
+
+# --- Numba JIT ---
+print("--- Numba JIT ---")
+
+# Numba もオプション依存 (NumPy が前提)
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 分類コード: 0=数値, 1=Fizz, 2=Buzz, 3=FizzBuzz
+CODE_WORDS = (None, "Fizz", "Buzz", "FizzBuzz")
+
+
+def _classify(out) -> None:
+    # 数値ループだけを JIT 対象にし、文字列化は呼び出し側で行う
+    for i in range(len(out)):
+        v = i + 1
+        out[i] = 3 if v % 15 == 0 else 1 if v % 3 == 0 else 2 if v % 5 == 0 else 0
+
+
+if njit is not None:
+    # cache=True でコンパイル結果をディスクに保存 (元の関数は _classify.py_func)
+    _classify = njit(cache=True)(_classify)
+
+
+def fizzbuzz_jit(n: int) -> List[str]:
+    codes = np.empty(n, np.uint8) if njit is not None else bytearray(n)
+    _classify(codes)
+    return [CODE_WORDS[c] or str(i) for i, c in enumerate(codes, start=1)]
+
+
+print(f"Numba available: {njit is not None}")
+print(", ".join(fizzbuzz_jit(15)))
+assert fizzbuzz_jit(3000) == fizzbuzz_functional(3000)
+
+print()
+
 # --- テスト ---
 print("--- Tests ---")
 
@@ -159,6 +261,11 @@ def test_fizzbuzz() -> None:
     # FizzBuzz (15の倍数)
     assert result[14] == "FizzBuzz", "Failed: 15"
 
+    # 他の実装と同じ結果になる
+    reference = fizzbuzz_functional(100)
+    assert fizzbuzz_lut(100) == reference, "Failed: lut"
+    assert fizzbuzz_output(100) == "".join(f"{s}\n" for s in reference), "Failed: output"
+
     print("All tests passed!")
 
 
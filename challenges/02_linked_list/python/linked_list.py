@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """LinkedList - Python 実装"""
 
-from typing import TypeVar, Generic, Optional, Iterator, List
+from collections import deque
+from typing import Deque, TypeVar, Generic, Optional, Iterator, List
 from dataclasses import dataclass
 
 print("=== LinkedList Demo ===\n")
@@ -10,7 +11,8 @@ T = TypeVar("T")
 
 
 # --- Node ---
-@dataclass
+# slots=True で __dict__ を持たせず、ノード 1 つあたりのメモリを削る
+@dataclass(slots=True)
 class Node(Generic[T]):
     value: T
     next: Optional["Node[T]"] = None
@@ -18,6 +20,8 @@ class Node(Generic[T]):
 
 # --- LinkedList ---
 class LinkedList(Generic[T]):
+    __slots__ = ("_head", "_tail", "_size")
+
     def __init__(self) -> None:
         self._head: Optional[Node[T]] = None
         self._tail: Optional[Node[T]] = None
@@ -151,6 +155,93 @@ class LinkedList(Generic[T]):
         return f"LinkedList([{' -> '.join(map(str, self))}])"
 
 
+# --- ArrayLinkedList (配列ベース) ---
+# ノードをヒープに散らばらせず、値を連続した list に格納する。
+# 走査・検索はキャッシュに乗りやすく、find / in / reverse は C 実装のループで動く。
+# 代わりに push_front / pop_front は要素のシフトが発生して O(n)。
+class ArrayLinkedList(Generic[T]):
+    __slots__ = ("_buf",)
+
+    def __init__(self) -> None:
+        self._buf: List[T] = []
+
+    @property
+    def size(self) -> int:
+        return len(self._buf)
+
+    def is_empty(self) -> bool:
+        return not self._buf
+
+    def push_front(self, value: T) -> "ArrayLinkedList[T]":
+        self._buf.insert(0, value)
+        return self
+
+    def push_back(self, value: T) -> "ArrayLinkedList[T]":
+        self._buf.append(value)
+        return self
+
+    def pop_front(self) -> Optional[T]:
+        return self._buf.pop(0) if self._buf else None
+
+    @property
+    def front(self) -> Optional[T]:
+        return self._buf[0] if self._buf else None
+
+    @property
+    def back(self) -> Optional[T]:
+        return self._buf[-1] if self._buf else None
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._buf)
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    # Node は find の戻り値としてだけ作る軽量なビュー
+    def find(self, value: T) -> Optional[Node[T]]:
+        return Node(value) if value in self._buf else None
+
+    def __contains__(self, value: T) -> bool:
+        return value in self._buf
+
+    def delete(self, value: T) -> Optional[T]:
+        try:
+            self._buf.remove(value)
+        except ValueError:
+            return None
+        return value
+
+    def reverse(self) -> "ArrayLinkedList[T]":
+        self._buf.reverse()
+        return self
+
+    def clear(self) -> None:
+        self._buf.clear()
+
+    def to_list(self) -> List[T]:
+        return list(self._buf)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}([{' -> '.join(map(str, self))}])"
+
+
+# --- DequeLinkedList (collections.deque ベース) ---
+# deque は C 実装のブロック連結リストで、両端の追加・削除が O(1)。
+# 実務の Python では自前の連結リストより deque を使うのが基本。
+class DequeLinkedList(ArrayLinkedList[T]):
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        self._buf: Deque[T] = deque()
+
+    def push_front(self, value: T) -> "DequeLinkedList[T]":
+        self._buf.appendleft(value)
+        return self
+
+    def pop_front(self) -> Optional[T]:
+        return self._buf.popleft() if self._buf else None
+
+
 # --- デモ ---
 print("--- Basic Operations ---")
 
@@ -200,12 +291,34 @@ print(f"After reverse: {lst}")
 
 print()
 
+print("--- Array-backed ---")
+arr: ArrayLinkedList[int] = ArrayLinkedList()
+for x in [1, 2, 3, 4, 5]:
+    arr.push_back(x)
+arr.push_front(0)
+print(f"List: {arr}")
+print(f"find(3): {arr.find(3)}")
+print(f"After reverse: {arr.reverse()}")
+
+print()
+
+print("--- Deque-backed ---")
+dq: DequeLinkedList[int] = DequeLinkedList()
+for x in [1, 2, 3]:
+    dq.push_back(x)
+dq.push_front(0)
+print(f"List: {dq}")
+print(f"pop_front: {dq.pop_front()}")
+print(f"After pop_front: {dq}")
+
+print()
+
 # --- テスト ---
 print("--- Tests ---")
 
 
-def run_tests() -> None:
-    lst: LinkedList[int] = LinkedList()
+def run_tests(cls: type = LinkedList) -> None:
+    lst = cls()
 
     # 空リスト
     assert lst.is_empty(), "empty? failed"
@@ -242,7 +355,9 @@ def run_tests() -> None:
     assert len(list(lst)) == 3, "iteration failed"
     assert 10 in lst, "contains failed"
 
-    print("All tests passed!")
+    print(f"{cls.__name__}: all tests passed!")
 
 
-run_tests()
+run_tests(LinkedList)
+run_tests(ArrayLinkedList)
+run_tests(DequeLinkedList)
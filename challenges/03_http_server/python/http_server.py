@@ -3,13 +3,21 @@
 
 import socket
 import json
-import re
-from typing import Dict, Callable, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Callable, Any, List, Optional, Set
 from dataclasses import dataclass, field
-from urllib.parse import parse_qs, urlparse
+from functools import cached_property
+from urllib.parse import parse_qs
 
 print("=== HTTP Server Demo ===\n")
 
+# recv 1 回あたりの読み込みサイズ
+RECV_SIZE = 65536
+
+# クライアントごとの送受信タイムアウト (秒)。止まったクライアントがワーカーを占有し続けないようにする
+CLIENT_TIMEOUT = 10.0
+
 
 # --- Request ---
 @dataclass
@@ -20,22 +28,28 @@ class Request:
     body: Optional[str] = None
     path_params: Dict[str, str] = field(default_factory=dict)
 
-    @property
+    # 初回アクセス時に 1 回だけパースしてインスタンスにキャッシュする
+    @cached_property
     def query_params(self) -> Dict[str, list]:
-        parsed = urlparse(self.path)
-        return parse_qs(parsed.query)
+        return parse_qs(self.path.partition("?")[2])
 
     @classmethod
     def parse(cls, client: socket.socket) -> Optional["Request"]:
         try:
-            data = b""
-            while b"\r\n\r\n" not in data:
-                chunk = client.recv(1024)
+            # bytes の += は毎回全体をコピーするので bytearray に追記する
+            data = bytearray()
+            header_end = -1
+            while header_end < 0:
+                chunk = client.recv(RECV_SIZE)
                 if not chunk:
                     return None
+                # 区切りがチャンク境界をまたぐ場合に備えて 3 バイト手前から探す
+                search_from = max(len(data) - 3, 0)
                 data += chunk
+                header_end = data.find(b"\r\n\r\n", search_from)
 
-            header_part, _, body_start = data.partition(b"\r\n\r\n")
+            header_part = bytes(data[:header_end])
+            body_start = data[header_end + 4:]
             lines = header_part.decode("utf-8").split("\r\n")
 
             if not lines:
@@ -61,7 +75,10 @@ class Request:
                 length = int(content_length)
                 body_data = body_start
                 while len(body_data) < length:
-                    body_data += client.recv(1024)
+                    chunk = client.recv(RECV_SIZE)
+                    if not chunk:
+                        break
+                    body_data += chunk
                 body = body_data[:length].decode("utf-8")
 
             return cls(method=method, path=path, headers=headers, body=body)
@@ -84,6 +101,8 @@ class Response:
         405: "Method Not Allowed",
         500: "Internal Server Error",
     }
+    # ステータス行はクラス定義時にエンコードしておく
+    STATUS_MESSAGE_BYTES = {k: v.encode("ascii") for k, v in STATUS_MESSAGES.items()}
 
     def __post_init__(self):
         if "Content-Type" not in self.headers:
@@ -105,56 +124,111 @@ class Response:
         return self
 
     def to_bytes(self) -> bytes:
-        self.headers["Content-Length"] = str(len(self.body.encode("utf-8")))
+        # ボディのエンコードは 1 回だけ、ヘッダーは join でまとめて組み立てる
+        body_bytes = self.body.encode("utf-8")
+        self.headers["Content-Length"] = str(len(body_bytes))
         self.headers["Connection"] = "close"
 
-        status_message = self.STATUS_MESSAGES.get(self.status, "Unknown")
-        response = f"HTTP/1.1 {self.status} {status_message}\r\n"
-        for key, value in self.headers.items():
-            response += f"{key}: {value}\r\n"
-        response += "\r\n"
-        response += self.body
-        return response.encode("utf-8")
+        status_message = self.STATUS_MESSAGE_BYTES.get(self.status, b"Unknown")
+        headers = "\r\n".join(f"{key}: {value}" for key, value in self.headers.items())
+        return b"".join((
+            b"HTTP/1.1 ", str(self.status).encode("ascii"), b" ", status_message, b"\r\n",
+            headers.encode("utf-8"), b"\r\n\r\n",
+            body_bytes,
+        ))
 
 
 # --- Router ---
 Handler = Callable[[Request], Response]
 
 
+# パスセグメント単位のトライのノード
+class _RouteNode:
+    __slots__ = ("children", "param_child", "handler", "param_names")
+
+    def __init__(self):
+        self.children: Dict[str, "_RouteNode"] = {}
+        self.param_child: Optional["_RouteNode"] = None
+        self.handler: Optional[Handler] = None
+        self.param_names: List[str] = []
+
+
 class Router:
     def __init__(self):
+        # 完全一致は dict で O(1)、パラメータ付きはセグメントのトライで O(セグメント数)
         self._routes: Dict[str, Dict[str, Handler]] = {"GET": {}, "POST": {}}
+        self._tries: Dict[str, _RouteNode] = {"GET": _RouteNode(), "POST": _RouteNode()}
+
+    def _add(self, method: str, path: str, handler: Handler) -> None:
+        if ":" not in path:
+            self._routes[method][path] = handler
+            return
+
+        # /hello/:name -> "hello" -> <:param>
+        node = self._tries[method]
+        names: List[str] = []
+        for segment in path.split("/")[1:]:
+            if segment.startswith(":"):
+                names.append(segment[1:])
+                if node.param_child is None:
+                    node.param_child = _RouteNode()
+                node = node.param_child
+            else:
+                node = node.children.setdefault(segment, _RouteNode())
+        node.handler = handler
+        node.param_names = names
 
     def get(self, path: str):
         def decorator(handler: Handler) -> Handler:
-            self._routes["GET"][path] = handler
+            self._add("GET", path, handler)
             return handler
         return decorator
 
     def post(self, path: str):
         def decorator(handler: Handler) -> Handler:
-            self._routes["POST"][path] = handler
+            self._add("POST", path, handler)
             return handler
         return decorator
 
+    @classmethod
+    def _match(
+        cls, node: _RouteNode, segments: List[str], i: int, values: List[str]
+    ) -> Optional[_RouteNode]:
+        if i == len(segments):
+            return node if node.handler is not None else None
+
+        segment = segments[i]
+        # リテラルを優先し、だめならパラメータ側を試す
+        child = node.children.get(segment)
+        if child is not None:
+            found = cls._match(child, segments, i + 1, values)
+            if found is not None:
+                return found
+        if node.param_child is not None and segment:
+            values.append(segment)
+            found = cls._match(node.param_child, segments, i + 1, values)
+            if found is not None:
+                return found
+            values.pop()
+        return None
+
     def route(self, request: Request) -> Response:
         # パスからクエリ文字列を除去
-        path = request.path.split("?")[0]
+        path = request.path.partition("?")[0]
 
         # 完全一致
-        if path in self._routes.get(request.method, {}):
-            handler = self._routes[request.method][path]
+        handler = self._routes.get(request.method, {}).get(path)
+        if handler is not None:
             return handler(request)
 
-        # パターンマッチ
-        for pattern, handler in self._routes.get(request.method, {}).items():
-            if ":" in pattern:
-                # /hello/:name -> /hello/(?P<name>[^/]+)
-                regex_pattern = re.sub(r":(\w+)", r"(?P<\1>[^/]+)", pattern)
-                match = re.fullmatch(regex_pattern, path)
-                if match:
-                    request.path_params = match.groupdict()
-                    return handler(request)
+        # トライを辿ってパラメータを集める
+        trie = self._tries.get(request.method)
+        if trie is not None:
+            values: List[str] = []
+            node = self._match(trie, path.split("/")[1:], 0, values)
+            if node is not None:
+                request.path_params = dict(zip(node.param_names, values))
+                return node.handler(request)
 
         # 404
         return Response(status=404).text(f"Not Found: {request.path}")
@@ -162,9 +236,13 @@ class Router:
 
 # --- Server ---
 class HTTPServer:
-    def __init__(self, port: int = 8080):
+    def __init__(self, port: int = 8080, max_workers: int = 32):
         self.port = port
+        self.max_workers = max_workers
         self.router = Router()
+        # 終了時に接続を切るため、受け付けてからワーカーが閉じるまでのソケットを覚えておく
+        self._clients: Set[socket.socket] = set()
+        self._clients_lock = threading.Lock()
 
     def get(self, path: str):
         return self.router.get(path)
@@ -176,7 +254,7 @@ class HTTPServer:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
             server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             server.bind(("127.0.0.1", self.port))
-            server.listen(5)
+            server.listen(128)
 
             print(f"Server started at http://127.0.0.1:{self.port}")
             print("Try:")
@@ -185,14 +263,40 @@ class HTTPServer:
             print(f"  curl http://localhost:{self.port}/json")
             print("\nPress Ctrl+C to stop\n")
 
+            # 受け付けたクライアントはスレッドプールで並行に処理し、
+            # 遅いクライアントが accept ループを塞がないようにする。
+            # 各クライアントには CLIENT_TIMEOUT があるので、止まった接続もいずれワーカーを解放する
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
             try:
                 while True:
                     client, _ = server.accept()
-                    self._handle_client(client)
+                    with self._clients_lock:
+                        self._clients.add(client)
+                    future = executor.submit(self._handle_client, client)
+                    future.add_done_callback(
+                        lambda f, client=client: self._drop_client(client) if f.cancelled() else None
+                    )
             except KeyboardInterrupt:
                 print("\nShutting down...")
+            finally:
+                # 接続中のクライアントを待たずに終了する。待ち行列は捨ててそのソケットを閉じ
+                # (done コールバック)、処理中のソケットは shutdown して recv / sendall を即座に戻らせる
+                executor.shutdown(wait=False, cancel_futures=True)
+                with self._clients_lock:
+                    clients = list(self._clients)
+                for client in clients:
+                    try:
+                        client.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+
+    def _drop_client(self, client: socket.socket):
+        with self._clients_lock:
+            self._clients.discard(client)
+        client.close()
 
     def _handle_client(self, client: socket.socket):
+        client.settimeout(CLIENT_TIMEOUT)
         try:
             request = Request.parse(client)
             if request is None:
@@ -207,7 +311,7 @@ class HTTPServer:
             error_response = Response(status=500).text("Internal Server Error")
             client.sendall(error_response.to_bytes())
         finally:
-            client.close()
+            self._drop_client(client)
 
 
 # --- メイン ---
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
-"""JSON Parser - Python 実装 (再帰下降パーサー)"""
+"""JSON Parser - Python 実装 (明示的スタックによる手書きパーサー)"""
 
-from typing import Any, Optional
+import json
+import re
+import sys
+from typing import Any, List, Optional, Tuple
 from dataclasses import dataclass
 
-print("=== JSON Parser Demo ===\n")
-
 
 # --- ParseError ---
 class ParseError(Exception):
@@ -14,8 +15,30 @@ class ParseError(Exception):
         self.position = position
 
 
+# JSON の空白・数字・エスケープ
+_WHITESPACE = " \t\n\r"
+_DIGITS = "0123456789"
+# \d は Unicode の数字にもマッチするので [0-9] で書く
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9][0-9]*)(?P<frac>\.[0-9]+)?(?P<exp>[eE][+-]?[0-9]+)?")
+_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "b": "\b",
+    "f": "\f",
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+}
+
+
 # --- Tokenizer ---
+# ホットループ (空白・数値・文字列) は self._input / self._position を
+# ローカル変数に束縛して回し、最後に位置を 1 回だけ書き戻す。
+# プロパティ経由の 1 文字ずつのアクセスより大幅に速い。
 class Tokenizer:
+    __slots__ = ("_input", "_position")
+
     def __init__(self, input_str: str):
         self._input = input_str
         self._position = 0
@@ -42,8 +65,12 @@ class Tokenizer:
         return char
 
     def skip_whitespace(self) -> None:
-        while self.current_char and self.current_char.isspace():
-            self.advance()
+        s = self._input
+        p = self._position
+        n = len(s)
+        while p < n and s[p] in _WHITESPACE:
+            p += 1
+        self._position = p
 
     def eof(self) -> bool:
         return self._position >= len(self._input)
@@ -55,9 +82,87 @@ class Tokenizer:
             )
         self.advance()
 
+    def read_keyword(self, keyword: str) -> None:
+        s = self._input
+        p = self._position
+        # 1 文字ずつ advance せず、startswith で一度に照合する
+        if s.startswith(keyword, p):
+            self._position = p + len(keyword)
+            return
+        for i, expected in enumerate(keyword):
+            actual = s[p + i] if p + i < len(s) else None
+            if actual != expected:
+                self._position = p + i + 1
+                raise ParseError(f"Expected '{expected}' but got '{actual}'", p + i + 1)
+
+    def read_string(self) -> str:
+        s = self._input
+        p = self._position + 1  # consume opening "
+        n = len(s)
+        result = []
+
+        # 次の " と \\ を str.find (C 実装) で探し、間の区間をまとめてスライスする
+        while True:
+            quote = s.find('"', p)
+            if quote < 0:
+                self._position = n
+                raise ParseError("Unterminated string", n)
+            backslash = s.find("\\", p, quote)
+            if backslash < 0:
+                result.append(s[p:quote])
+                p = quote + 1
+                break
+
+            result.append(s[p:backslash])
+            p = backslash + 1
+            if p >= n:
+                raise ParseError("Unterminated string", p)
+            esc = s[p]
+            p += 1
+            if esc in _ESCAPES:
+                result.append(_ESCAPES[esc])
+            elif esc == "u":
+                # Unicode escape
+                hex_chars = s[p:p + 4]
+                p += 4
+                try:
+                    result.append(chr(int(hex_chars, 16)))
+                except ValueError:
+                    raise ParseError(f"Invalid unicode escape: \\u{hex_chars}", p) from None
+            else:
+                raise ParseError(f"Invalid escape sequence: \\{esc}", p)
+
+        self._position = p
+        return "".join(result)
+
+    def read_number(self) -> float | int:
+        s = self._input
+        p = self._position
+
+        # 数値全体を正規表現 (C 実装) で一度にマッチさせる
+        m = _NUMBER_RE.match(s, p)
+        if m is None:
+            raise ParseError("Expected digit", p + 1 if s.startswith("-", p) else p)
+
+        # "1." や "1e" は正規表現が手前で止まるので、続く文字で判定する
+        end = m.end()
+        frac, exp = m.group("frac"), m.group("exp")
+        next_char = s[end:end + 1]
+        if next_char == "." and frac is None and exp is None:
+            raise ParseError("Expected digit after decimal point", end + 1)
+        if next_char and next_char in "eE" and exp is None:
+            sign = s[end + 1:end + 2]
+            raise ParseError("Expected digit in exponent", end + 2 if sign and sign in "+-" else end + 1)
+
+        self._position = end
+        num_value = m.group()
+        return float(num_value) if frac or exp else int(num_value)
+
 
 # --- Parser ---
 class JSONParser:
+    __slots__ = ("_tokenizer",)
+
     def __init__(self, input_str: str):
         self._tokenizer = Tokenizer(input_str)
 
@@ -74,25 +179,69 @@ class JSONParser:
         return value
 
     def _parse_value(self) -> Any:
-        self._tokenizer.skip_whitespace()
-        char = self._tokenizer.current_char
+        # 配列・オブジェクトは再帰せず、構築中のコンテナを明示的なスタックに積む。
+        # 深いネストでも RecursionError にならず、フレーム生成のコストもかからない。
+        tokenizer = self._tokenizer
+        stack: List[Any] = []
+        keys: List[str] = []  # 値を待っているオブジェクトのキー
+
+        while True:
+            # 値の開始
+            tokenizer.skip_whitespace()
+            char = tokenizer.current_char
+            if char == "[":
+                tokenizer.advance()
+                tokenizer.skip_whitespace()
+                if tokenizer.current_char != "]":
+                    stack.append([])
+                    continue
+                tokenizer.advance()
+                value: Any = []
+            elif char == "{":
+                tokenizer.advance()
+                tokenizer.skip_whitespace()
+                if tokenizer.current_char != "}":
+                    stack.append({})
+                    keys.append(self._parse_key())
+                    continue
+                tokenizer.advance()
+                value = {}
+            else:
+                value = self._parse_scalar(char)
+
+            # 値が完成したら親に格納し、閉じ括弧が続く限りコンテナを閉じていく
+            while stack:
+                parent = stack[-1]
+                tokenizer.skip_whitespace()
+                char = tokenizer.current_char
+                if type(parent) is list:
+                    parent.append(value)
+                    if char == ",":
+                        tokenizer.advance()
+                        break
+                    if char != "]":
+                        raise ParseError("Expected ',' or ']'", tokenizer.position)
+                else:
+                    parent[keys.pop()] = value
+                    if char == ",":
+                        tokenizer.advance()
+                        keys.append(self._parse_key())
+                        break
+                    if char != "}":
+                        raise ParseError("Expected ',' or '}'", tokenizer.position)
+                tokenizer.advance()
+                value = stack.pop()
+            else:
+                return value
 
+    def _parse_scalar(self, char: Optional[str]) -> Any:
+        # if/elif の連鎖ではなく、先頭文字をキーにした 1 回の dict 引きで分岐する
+        parser = self._SCALAR_PARSERS.get(char)
+        if parser is not None:
+            return parser(self)
         if char is None:
             raise ParseError("Unexpected end of input", self._tokenizer.position)
-        elif char == "n":
-            return self._parse_null()
-        elif char == "t" or char == "f":
-            return self._parse_bool()
-        elif char == '"':
-            return self._parse_string()
-        elif char == "[":
-            return self._parse_array()
-        elif char == "{":
-            return self._parse_object()
-        elif char == "-" or char.isdigit():
-            return self._parse_number()
-        else:
-            raise ParseError(f"Unexpected character: '{char}'", self._tokenizer.position)
+        raise ParseError(f"Unexpected character: '{char}'", self._tokenizer.position)
 
     def _parse_null(self) -> None:
         self._expect_keyword("null")
@@ -107,176 +256,189 @@ class JSONParser:
             return False
 
     def _expect_keyword(self, keyword: str) -> None:
-        for expected in keyword:
-            actual = self._tokenizer.advance()
-            if actual != expected:
-                raise ParseError(
-                    f"Expected '{expected}' but got '{actual}'",
-                    self._tokenizer.position,
-                )
+        self._tokenizer.read_keyword(keyword)
 
     def _parse_string(self) -> str:
-        self._tokenizer.advance()  # consume opening "
-        result = []
-
-        while True:
-            char = self._tokenizer.advance()
-
-            if char is None:
-                raise ParseError("Unterminated string", self._tokenizer.position)
-            elif char == '"':
-                break
-            elif char == "\\":
-                result.append(self._parse_escape_sequence())
-            else:
-                result.append(char)
-
-        return "".join(result)
-
-    def _parse_escape_sequence(self) -> str:
-        char = self._tokenizer.advance()
-
-        escape_map = {
-            "n": "\n",
-            "t": "\t",
-            "r": "\r",
-            '"': '"',
-            "\\": "\\",
-            "/": "/",
-        }
-
-        if char in escape_map:
-            return escape_map[char]
-        elif char == "u":
-            # Unicode escape
-            hex_chars = "".join(self._tokenizer.advance() or "" for _ in range(4))
-            return chr(int(hex_chars, 16))
-        else:
-            raise ParseError(
-                f"Invalid escape sequence: \\{char}", self._tokenizer.position
-            )
+        return self._tokenizer.read_string()
 
     def _parse_number(self) -> float | int:
-        num_str = []
-
-        # 負号
-        if self._tokenizer.current_char == "-":
-            num_str.append(self._tokenizer.advance())
-
-        # 整数部
-        if self._tokenizer.current_char == "0":
-            num_str.append(self._tokenizer.advance())
-        elif self._tokenizer.current_char and self._tokenizer.current_char.isdigit():
-            while self._tokenizer.current_char and self._tokenizer.current_char.isdigit():
-                num_str.append(self._tokenizer.advance())
-        else:
-            raise ParseError("Expected digit", self._tokenizer.position)
-
-        is_float = False
-
-        # 小数部
-        if self._tokenizer.current_char == ".":
-            is_float = True
-            num_str.append(self._tokenizer.advance())
-            if not (
-                self._tokenizer.current_char
-                and self._tokenizer.current_char.isdigit()
-            ):
-                raise ParseError(
-                    "Expected digit after decimal point", self._tokenizer.position
-                )
-            while self._tokenizer.current_char and self._tokenizer.current_char.isdigit():
-                num_str.append(self._tokenizer.advance())
-
-        # 指数部
-        if self._tokenizer.current_char and self._tokenizer.current_char in "eE":
-            is_float = True
-            num_str.append(self._tokenizer.advance())
-            if self._tokenizer.current_char and self._tokenizer.current_char in "+-":
-                num_str.append(self._tokenizer.advance())
-            if not (
-                self._tokenizer.current_char
-                and self._tokenizer.current_char.isdigit()
-            ):
-                raise ParseError(
-                    "Expected digit in exponent", self._tokenizer.position
-                )
-            while self._tokenizer.current_char and self._tokenizer.current_char.isdigit():
-                num_str.append(self._tokenizer.advance())
-
-        num_value = "".join(num_str)
-        return float(num_value) if is_float else int(num_value)
-
-    def _parse_array(self) -> list:
-        self._tokenizer.advance()  # consume [
-        self._tokenizer.skip_whitespace()
-
-        arr = []
-
-        # 空配列
-        if self._tokenizer.current_char == "]":
-            self._tokenizer.advance()
-            return arr
-
-        while True:
-            arr.append(self._parse_value())
-            self._tokenizer.skip_whitespace()
-
-            char = self._tokenizer.current_char
-            if char == ",":
-                self._tokenizer.advance()
-                self._tokenizer.skip_whitespace()
-            elif char == "]":
-                self._tokenizer.advance()
-                break
-            else:
-                raise ParseError("Expected ',' or ']'", self._tokenizer.position)
+        return self._tokenizer.read_number()
 
-        return arr
-
-    def _parse_object(self) -> dict:
-        self._tokenizer.advance()  # consume {
+    def _parse_key(self) -> str:
         self._tokenizer.skip_whitespace()
+        if self._tokenizer.current_char != '"':
+            raise ParseError("Expected string key", self._tokenizer.position)
+        # キーは同じ文字列が繰り返し現れるので intern して共有する (値は intern しない)
+        key = sys.intern(self._parse_string())
+        self._tokenizer.skip_whitespace()
+        self._tokenizer.expect(":")
+        return key
 
-        obj = {}
-
-        # 空オブジェクト
-        if self._tokenizer.current_char == "}":
-            self._tokenizer.advance()
-            return obj
-
-        while True:
-            self._tokenizer.skip_whitespace()
-
-            # キー
-            if self._tokenizer.current_char != '"':
-                raise ParseError("Expected string key", self._tokenizer.position)
-            key = self._parse_string()
+    # 先頭文字 → スカラーのパース関数
+    _SCALAR_PARSERS = {
+        "n": _parse_null,
+        "t": _parse_bool,
+        "f": _parse_bool,
+        '"': _parse_string,
+        "-": _parse_number,
+        **dict.fromkeys(_DIGITS, _parse_number),
+    }
 
-            self._tokenizer.skip_whitespace()
-            self._tokenizer.expect(":")
 
-            # 値
-            value = self._parse_value()
-            obj[key] = value
+# --- 便利関数 ---
+def parse_json(input_str: str) -> Any:
+    return JSONParser(input_str).parse()
 
-            self._tokenizer.skip_whitespace()
 
-            char = self._tokenizer.current_char
-            if char == ",":
-                self._tokenizer.advance()
-            elif char == "}":
-                self._tokenizer.advance()
-                break
+# 実運用では C 拡張の json.loads を使う (自前パーサーの数十倍速い)。
+# エラーは位置付きの ParseError に揃える。
+# ※ json.loads は NaN / Infinity も受け付ける点だけ厳密な JSON と異なる
+def parse_json_stdlib(input_str: str) -> Any:
+    try:
+        return json.loads(input_str)
+    except json.JSONDecodeError as e:
+        raise ParseError(e.msg, e.pos) from None
+
+
+# --- トークン配列パーサー ---
+# 字句解析と構文解析を分離する。まず正規表現 (C 実装) で入力全体を
+# (kind, start, end) のトークン配列にし、その配列を明示的なスタックで走査する。
+# kind: 記号はその文字、文字列は '"'、数値は '0'、リテラルは先頭文字 (t/f/n)
+_TOKEN_RE = re.compile(
+    r'[ \t\n\r]*(?:'
+    r'([{}\[\],:])'
+    r'|"([^"\\]*(?:\\.[^"\\]*)*)"'
+    r'|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)'
+    r'|(true|false|null)'
+    r')'
+)
+# bytes 入力用 (UTF-8 をデコードせずに走査する)
+_TOKEN_RE_BYTES = re.compile(_TOKEN_RE.pattern.encode("ascii"))
+_ESCAPE_RE = re.compile(r"\\(?:u(.{0,4})|(.))", re.DOTALL)
+_LITERALS = {"t": True, "f": False, "n": None}
+
+
+# str と bytes のどちらも受け付ける。bytes の場合はデコードせずに走査し、
+# 位置はバイトオフセットになる
+def tokenize(input_str: str | bytes) -> List[Tuple[str, int, int]]:
+    is_bytes = isinstance(input_str, bytes)
+    token_re = _TOKEN_RE_BYTES if is_bytes else _TOKEN_RE
+    tokens: List[Tuple[str, int, int]] = []
+    pos = 0
+    for m in token_re.finditer(input_str):
+        if m.start() != pos:
+            break
+        group = m.lastindex
+        start, end = m.span(group)
+        if group == 2:
+            kind = '"'
+        elif group == 3:
+            kind = "0"
+        else:
+            kind = chr(input_str[start]) if is_bytes else input_str[start]
+        tokens.append((kind, start, end))
+        pos = m.end()
+
+    # マッチしなかった残りが空白だけでなければエラー
+    rest = len(input_str) - len(input_str[pos:].lstrip(b" \t\n\r" if is_bytes else " \t\n\r"))
+    if rest < len(input_str):
+        char = input_str[rest:rest + 1]
+        if is_bytes:
+            char = char.decode("latin-1")
+        raise ParseError(f"Unexpected character: '{char}'", rest)
+    return tokens
+
+
+# トークンの区間を str で取り出す。bytes 入力はここで初めてデコードする
+def _token_text(input_str: str | bytes, start: int, end: int) -> str:
+    text = input_str[start:end]
+    return text if type(text) is str else text.decode("utf-8")
+
+
+def _unescape(body: str, start: int) -> str:
+    def replace(m: "re.Match[str]") -> str:
+        hex_chars, esc = m.groups()
+        if hex_chars is not None:
+            if len(hex_chars) == 4:
+                try:
+                    return chr(int(hex_chars, 16))
+                except ValueError:
+                    pass
+            raise ParseError(f"Invalid unicode escape: \\u{hex_chars}", start + m.end())
+        if esc in _ESCAPES:
+            return _ESCAPES[esc]
+        raise ParseError(f"Invalid escape sequence: \\{esc}", start + m.end())
+
+    return _ESCAPE_RE.sub(replace, body) if "\\" in body else body
+
+
+# パーサーの状態
+_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _COMMA_OR_END = range(6)
+
+
+def parse_json_tokens(input_str: str | bytes) -> Any:
+    tokens = tokenize(input_str)
+    stack: List[Any] = []  # 構築中のコンテナ
+    keys: List[str] = []  # 値を待っているオブジェクトのキー
+    state = _VALUE
+
+    for i, (kind, start, end) in enumerate(tokens):
+        if state == _COLON:
+            if kind != ":":
+                raise ParseError(f"Expected ':' but got '{kind}'", start)
+            state = _VALUE
+            continue
+
+        if state == _COMMA_OR_END:
+            is_list = type(stack[-1]) is list
+            if kind == ",":
+                state = _VALUE if is_list else _KEY
+                continue
+            if kind != ("]" if is_list else "}"):
+                raise ParseError("Expected ',' or ']'" if is_list else "Expected ',' or '}'", start)
+            value = stack.pop()
+        elif state == _KEY or state == _KEY_OR_END:
+            if kind == "}" and state == _KEY_OR_END:
+                value = stack.pop()
+            elif kind == '"':
+                keys.append(sys.intern(_unescape(_token_text(input_str, start, end), start)))
+                state = _COLON
+                continue
             else:
-                raise ParseError("Expected ',' or '}'", self._tokenizer.position)
-
-        return obj
-
+                raise ParseError("Expected string key", start)
+        elif kind == "[":
+            stack.append([])
+            state = _VALUE_OR_END
+            continue
+        elif kind == "{":
+            stack.append({})
+            state = _KEY_OR_END
+            continue
+        elif kind == "]" and state == _VALUE_OR_END:
+            value = stack.pop()
+        elif kind == '"':
+            value = _unescape(_token_text(input_str, start, end), start)
+        elif kind == "0":
+            text = _token_text(input_str, start, end)
+            value = float(text) if "." in text or "e" in text or "E" in text else int(text)
+        elif kind in _LITERALS:
+            value = _LITERALS[kind]
+        else:
+            raise ParseError(f"Unexpected character: '{kind}'", start)
+
+        # 値が 1 つ完成した: 親コンテナに格納するか、トップレベルなら終了
+        if not stack:
+            if i + 1 < len(tokens):
+                raise ParseError("Unexpected characters after JSON value", tokens[i + 1][1])
+            return value
+        parent = stack[-1]
+        if type(parent) is list:
+            parent.append(value)
+        else:
+            parent[keys.pop()] = value
+        state = _COMMA_OR_END
 
-# --- 便利関数 ---
-def parse_json(input_str: str) -> Any:
-    return JSONParser(input_str).parse()
+    raise ParseError("Unexpected end of input", len(input_str))
 
 
 # --- デモ ---
@@ -291,20 +453,20 @@ examples = [
     '{"nested": {"array": [1, true, null]}}',
 ]
 
-for json_str in examples:
-    print(f"Input:  {json_str}")
-    try:
-        result = parse_json(json_str)
-        print(f"Parsed: {result!r}")
-    except ParseError as e:
-        print(f"Error:  {e}")
-    print()
 
 
-# --- テスト ---
-print("--- Tests ---")
+def demo() -> None:
+    for json_str in examples:
+        print(f"Input:  {json_str}")
+        try:
+            result = parse_json(json_str)
+            print(f"Parsed: {result!r}")
+        except ParseError as e:
+            print(f"Error:  {e}")
+        print()
 
 
+# --- テスト ---
 def run_tests() -> None:
     # null
     assert parse_json("null") is None, "null failed"
@@ -336,6 +498,16 @@ def run_tests() -> None:
     nested = parse_json('{"arr": [1, {"nested": true}]}')
     assert nested["arr"][1]["nested"] is True, "nested failed"
 
+    # オブジェクトのキーは intern される
+    a, b = parse_json('[{"key": 1}, {"key": 2}]')
+    assert next(iter(a)) is next(iter(b)), "key interning failed"
+
+    # 再帰上限を超える深いネスト
+    deep = parse_json("[" * 5000 + "]" * 5000)
+    for _ in range(4999):
+        deep = deep[0]
+    assert deep == [], "deep nesting failed"
+
     # whitespace
     assert parse_json('  { "key" : "value" }  ') == {"key": "value"}, "whitespace failed"
 
@@ -352,7 +524,37 @@ def run_tests() -> None:
     except ParseError:
         pass
 
+    # 標準ライブラリ版・トークン配列版と結果が一致する
+    for json_str in examples:
+        assert parse_json_stdlib(json_str) == parse_json(json_str), f"stdlib mismatch: {json_str}"
+        assert parse_json_tokens(json_str) == parse_json(json_str), f"tokens mismatch: {json_str}"
+    for json_str in examples:
+        assert parse_json_tokens(json_str.encode()) == parse_json(json_str), f"bytes mismatch: {json_str}"
+    assert parse_json_tokens('{"名前": "パイソン"}'.encode()) == {"名前": "パイソン"}, "bytes utf-8 failed"
+    for bad in ["", "{", "[1,]", '{"a" 1}', "tru", "1."]:
+        try:
+            parse_json_tokens(bad)
+            assert False, f"tokens: {bad!r} should fail"
+        except ParseError:
+            pass
+    try:
+        parse_json_stdlib("{")
+        assert False, "stdlib: unclosed object should fail"
+    except ParseError as e:
+        assert e.position == 1, "stdlib: error position failed"
+
     print("All tests passed!")
 
 
-run_tests()
+# --- メイン ---
+# デモもトップレベルではなく関数に入れておくと、PyPy の JIT が
+# ループをトレースして特殊化しやすい
+def main() -> None:
+    print("=== JSON Parser Demo ===\n")
+    demo()
+    print("--- Tests ---")
+    run_tests()
+
+
+if __name__ == "__main__":
+    main()
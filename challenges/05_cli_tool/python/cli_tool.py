@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 """CLI Tool - Python 実装 (TODO管理ツール)"""
 
-import argparse
 import sys
+import hashlib
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List, Optional
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import argparse
 
 # --- Task ---
-@dataclass
+# slots=True でインスタンスごとの __dict__ を持たせない (大きな TODO ファイル向け)。
+# タスク同士は ID で比較し、表示は to_line を使うので __eq__ / __repr__ は生成しない
+@dataclass(slots=True, eq=False, repr=False)
 class Task:
     id: int
     description: str
@@ -20,39 +26,187 @@ class Task:
 
     @classmethod
     def from_line(cls, id: int, line: str) -> "Task":
+        # strip は 1 回だけ。接頭辞は固定長なのでスライスで判定する
         line = line.strip()
-        if line.startswith("[x]"):
-            return cls(id=id, description=line[4:].strip(), done=True)
-        elif line.startswith("[ ]"):
-            return cls(id=id, description=line[4:].strip(), done=False)
+        prefix = line[:3]
+        if prefix == "[x]":
+            return cls(id=id, description=line[3:].lstrip(), done=True)
+        elif prefix == "[ ]":
+            return cls(id=id, description=line[3:].lstrip(), done=False)
         else:
             return cls(id=id, description=line, done=False)
 
+    @classmethod
+    def from_bytes(cls, id: int, line: bytes) -> "Task":
+        # 接頭辞はバイト列のまま判定し、UTF-8 のデコードは説明部分だけにする
+        line = line.strip()
+        prefix = line[:3]
+        if prefix == b"[x]":
+            return cls(id=id, description=line[3:].decode("utf-8").strip(), done=True)
+        elif prefix == b"[ ]":
+            return cls(id=id, description=line[3:].decode("utf-8").strip(), done=False)
+        else:
+            return cls(id=id, description=line.decode("utf-8").strip(), done=False)
+
 
 # --- TaskStore ---
+# タスクファイルは他言語版と共通の形式 ("[ ] desc" / "[x] desc" を 1 行ずつ) のまま読み書きする。
+# 削除しても振り直さない ID は隣の <file>.ids に持つ:
+#   # next_id: 4
+#   # sha256: <タスクファイルの SHA-256>
+#   1
+#   3
+# 3 行目以降はタスクファイルの各行 (空行を除く) の ID を同じ順に並べたもの。
+# next_id は最後に全体を書き直した時点のカウンタで、削除済みの ID を再利用しないために使う。
+# sha256 は .ids と対応するタスクファイルの内容。.ids が無い、またはハッシュが合わない
+# (他の実装がタスクファイルだけを書き換えた) ときは、空行を飛ばした 1 からの連番として読む。
+# 行数が同じままの並べ替えや差し替えでも、ID が別のタスクに付け替わらない。
 class TaskStore:
+    _HEADER = b"# next_id:"
+    _DIGEST = b"# sha256:"
+
     def __init__(self, file_path: str):
         self._path = Path(file_path)
+        self._ids_path = self._path.with_name(self._path.name + ".ids")
+        # (両ファイルの (mtime_ns, size), 解析済みタスク)。ファイルが変わらない限り再パースしない
+        self._cache: Optional[Tuple[Any, List[Task]]] = None
+        self._max_id = 0
+        # .ids がタスクファイルの行と対応しているか
+        self._synced = False
+        # タスクファイル全体の SHA-256。追記時は続きから更新する
+        self._digest = hashlib.sha256()
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _stamp(self) -> Any:
+        main = self._stat(self._path)
+        if main is None:
+            return None
+        return (main, self._stat(self._ids_path))
+
+    def _set_cache(self, stamp: Any, tasks: List[Task], max_id: int, synced: bool, digest: Any) -> None:
+        self._cache = (stamp, tasks) if stamp is not None else None
+        self._max_id = max_id
+        self._synced = synced
+        self._digest = digest
+
+    def _read_ids(self) -> Optional[Tuple[int, bytes, List[int]]]:
+        # (next_id - 1, タスクファイルのハッシュ, ID の並び) を返す。無い・壊れている場合は None
+        try:
+            lines = self._ids_path.read_bytes().splitlines()
+        except FileNotFoundError:
+            return None
+        header, digest = self._HEADER, self._DIGEST
+        if len(lines) < 2 or not lines[0].startswith(header) or not lines[1].startswith(digest):
+            return None
+        counter = lines[0][len(header):].strip()
+        if not counter.isdigit() or not all(line.isdigit() for line in lines[2:]):
+            return None
+        ids = [int(line) for line in lines[2:]]
+        if len(set(ids)) != len(ids):
+            return None
+        return int(counter) - 1, lines[1][len(digest):].strip(), ids
+
+    def _write_ids(self, tasks: List[Task], max_id: int, digest: Any) -> None:
+        lines = [f"# next_id: {max_id + 1}", f"# sha256: {digest.hexdigest()}"]
+        lines.extend(str(task.id) for task in tasks)
+        self._ids_path.write_bytes(("\n".join(lines) + "\n").encode("ascii"))
+
+    def _cached_tasks(self) -> List[Task]:
+        stamp = self._stamp()
+        if stamp is None:
+            self._set_cache(None, [], 0, False, hashlib.sha256())
+            return []
+
+        if self._cache is None or self._cache[0] != stamp:
+            data = self._path.read_bytes()
+            digest = hashlib.sha256(data)
+            tasks: List[Task] = []
+            for line in data.splitlines():
+                if line and not line.isspace():
+                    tasks.append(Task.from_bytes(len(tasks) + 1, line))
+
+            read = self._read_ids()
+            if read is not None and read[1] == digest.hexdigest().encode("ascii") and len(read[2]) == len(tasks):
+                counter, _, ids = read
+                for task, id in zip(tasks, ids):
+                    task.id = id
+                self._set_cache(stamp, tasks, max(counter, max(ids, default=0)), True, digest)
+            else:
+                # 連番で読む。カウンタだけは読めれば引き継いで、ID の再利用を減らす
+                counter = read[0] if read is not None else 0
+                self._set_cache(stamp, tasks, max(counter, len(tasks)), False, digest)
+        return self._cache[1]
 
     def load(self) -> List[Task]:
-        if not self._path.exists():
-            return []
+        # 呼び出し側が書き換えてもキャッシュが壊れないようコピーを返す
+        return [Task(t.id, t.description, t.done) for t in self._cached_tasks()]
 
-        tasks = []
-        for i, line in enumerate(self._path.read_text().splitlines(), start=1):
-            if line.strip():
-                tasks.append(Task.from_line(i, line))
-        return tasks
+    def next_id(self) -> int:
+        self._cached_tasks()
+        return self._max_id + 1
 
-    def save(self, tasks: List[Task]) -> None:
+    def save(self, tasks: List[Task], next_id: int = 0) -> None:
+        # next_id には、保存しないまま消えた ID (追加してすぐ削除など) も含めたカウンタを渡せる
+        max_id = max(self.next_id(), next_id) - 1
+        max_id = max(max_id, max((t.id for t in tasks), default=0))
+
+        # テキスト層 (改行変換・逐次エンコード) を通さず、まとめてエンコードして書く
         content = "\n".join(task.to_line() for task in tasks)
         if content:
             content += "\n"
-        self._path.write_text(content)
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data)
+        self._path.write_bytes(data)
+        self._write_ids(tasks, max_id, digest)
+
+        # 書いた内容をそのままキャッシュする
+        cached = [Task(t.id, t.description, t.done) for t in tasks]
+        self._set_cache(self._stamp(), cached, max_id, True, digest)
+
+    def append(self, task: Task) -> None:
+        tasks = self._cached_tasks()
+
+        # タスクファイルは全体を書き直さず 1 行追記するだけなので、ファイルサイズに関係なく O(1)
+        with self._path.open("a+b") as f:
+            line = (task.to_line() + "\n").encode("utf-8")
+            # 手で編集されて末尾に改行が無い場合は補う
+            if f.tell() > 0:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+
+        digest = self._digest.copy()
+        digest.update(line)
+        max_id = max(self._max_id, task.id)
+        if self._synced:
+            # .ids も追記だけ。next_id の行は更新しないが、読み込み時に各 ID からも求める。
+            # ハッシュの行は長さが変わらないので、その場で上書きする
+            with self._ids_path.open("r+b") as f:
+                f.seek(len(f.readline()))
+                f.write(f"# sha256: {digest.hexdigest()}\n".encode("ascii"))
+                f.seek(0, 2)
+                f.write(f"{task.id}\n".encode("ascii"))
+        else:
+            # .ids が無いか食い違っているので、今の並びで作り直す (タスクファイルはそのまま)
+            self._write_ids(tasks + [task], max_id, digest)
+
+        tasks.append(Task(task.id, task.description, task.done))
+        self._set_cache(self._stamp(), tasks, max_id, True, digest)
 
 
 # --- Commands ---
 class Commands:
+    # done (bool) で引く一覧表示の状態欄
+    _LIST_MARKS = (" [ ] ", " [\u2713] ")
+
     def __init__(self, store: TaskStore, verbose: bool = False):
         self._store = store
         self._verbose = verbose
@@ -62,98 +216,111 @@ class Commands:
             print(f"  [verbose] {message}")
 
     def add(self, description: str) -> None:
-        tasks = self._store.load()
-        tasks.append(Task(id=len(tasks) + 1, description=description, done=False))
-        self._store.save(tasks)
-        print(f"Added: {description}")
-        self._verbose_log(f"Total tasks: {len(tasks)}")
+        self.batch([("add", description)])
 
     def list(self) -> None:
-        tasks = self._store.load()
+        self._print_tasks(self._store.load())
 
+    def _print_tasks(self, tasks: List[Task]) -> None:
         if not tasks:
             print("No tasks found.")
             return
 
-        print("Tasks:")
-        for task in tasks:
-            status = "\u2713" if task.done else " "
-            print(f"  {task.id} [{status}] {task.description}")
+        # 行ごとに print せず、1 つの文字列にまとめて write を 1 回で済ませる
+        marks = self._LIST_MARKS
+        lines = ["Tasks:"]
+        lines.extend(f"  {t.id}{marks[t.done]}{t.description}" for t in tasks)
 
         if self._verbose:
             done_count = sum(1 for t in tasks if t.done)
-            print(f"\n  Total: {len(tasks)}, Done: {done_count}, Pending: {len(tasks) - done_count}")
+            lines.append(f"\n  Total: {len(tasks)}, Done: {done_count}, Pending: {len(tasks) - done_count}")
 
-    def done(self, id: int) -> None:
-        tasks = self._store.load()
-        task = next((t for t in tasks if t.id == id), None)
-
-        if task is None:
-            print(f"Task {id} not found")
-            return
-
-        if task.done:
-            print(f"Task {id} is already done")
-            return
+        sys.stdout.write("\n".join(lines) + "\n")
 
-        task.done = True
-        self._store.save(tasks)
-        print(f"Done: {task.description}")
+    def done(self, id: int) -> None:
+        self.batch([("done", id)])
 
     def undo(self, id: int) -> None:
-        tasks = self._store.load()
-        task = next((t for t in tasks if t.id == id), None)
-
-        if task is None:
-            print(f"Task {id} not found")
-            return
-
-        if not task.done:
-            print(f"Task {id} is not completed")
-            return
-
-        task.done = False
-        self._store.save(tasks)
-        print(f"Undone: {task.description}")
+        self.batch([("undo", id)])
 
     def delete(self, id: int) -> None:
-        tasks = self._store.load()
-        task = next((t for t in tasks if t.id == id), None)
-
-        if task is None:
-            print(f"Task {id} not found")
-            return
-
-        tasks.remove(task)
-        # IDを振り直す
-        for i, t in enumerate(tasks, start=1):
-            t.id = i
-        self._store.save(tasks)
-        print(f"Deleted: {task.description}")
+        self.batch([("delete", id)])
 
     def clear(self) -> None:
-        tasks = self._store.load()
-        done_tasks = [t for t in tasks if t.done]
-        pending_tasks = [t for t in tasks if not t.done]
-
-        if not done_tasks:
-            print("No completed tasks to clear.")
-            return
-
-        # IDを振り直して保存
-        for i, t in enumerate(pending_tasks, start=1):
-            t.id = i
-        self._store.save(pending_tasks)
-
-        print(f"Cleared {len(done_tasks)} completed task(s).")
-
-        if self._verbose:
-            for t in done_tasks:
-                print(f"  - {t.description}")
+        self.batch([("clear", None)])
+
+    def batch(self, ops: List[Tuple[str, Any]]) -> None:
+        # 読み込みは 1 回だけ。各操作はメモリ上で行い、最後にまとめて書き込む。
+        # ID -> Task の dict は挿入順を保つので、そのままファイルの並び順になる
+        tasks: Dict[int, Task] = {t.id: t for t in self._store.load()}
+        next_id = self._store.next_id()
+        added: List[Task] = []
+        rewrite = False
+
+        for op, arg in ops:
+            if op == "add":
+                task = Task(id=next_id, description=arg, done=False)
+                next_id += 1
+                tasks[task.id] = task
+                added.append(task)
+                print(f"Added: {arg}")
+                self._verbose_log(f"Total tasks: {len(tasks)}")
+
+            elif op in ("done", "undo"):
+                task = tasks.get(arg)
+                if task is None:
+                    print(f"Task {arg} not found")
+                elif op == "done" and task.done:
+                    print(f"Task {arg} is already done")
+                elif op == "undo" and not task.done:
+                    print(f"Task {arg} is not completed")
+                else:
+                    task.done = op == "done"
+                    rewrite = True
+                    print(f"{'Done' if task.done else 'Undone'}: {task.description}")
+
+            elif op == "delete":
+                # 残りのタスクの ID は振り直さない
+                task = tasks.pop(arg, None)
+                if task is None:
+                    print(f"Task {arg} not found")
+                else:
+                    rewrite = True
+                    print(f"Deleted: {task.description}")
+
+            elif op == "clear":
+                done_tasks = [t for t in tasks.values() if t.done]
+                if not done_tasks:
+                    print("No completed tasks to clear.")
+                    continue
+                for t in done_tasks:
+                    del tasks[t.id]
+                rewrite = True
+                print(f"Cleared {len(done_tasks)} completed task(s).")
+                if self._verbose:
+                    for t in done_tasks:
+                        print(f"  - {t.description}")
+
+            elif op == "list":
+                # バッチの途中の状態 (まだ保存していない変更を含む) を表示する
+                self._print_tasks(list(tasks.values()))
+
+            else:
+                raise ValueError(f"unknown operation: {op}")
+
+        if rewrite:
+            self._store.save(list(tasks.values()), next_id)
+        else:
+            # 追加だけなら全体を書き直さず追記で済ませる
+            for task in added:
+                self._store.append(task)
 
 
 # --- CLI ---
-def build_parser() -> argparse.ArgumentParser:
+# argparse の import と組み立ては --help やエラー表示が必要になったときだけ行う
+def build_parser() -> "argparse.ArgumentParser":
+    import argparse
+
     parser = argparse.ArgumentParser(
         prog="todo",
         description="A simple TODO CLI tool",
@@ -166,12 +333,20 @@ COMMANDS:
     undo <id>     Mark a task as not done
     delete <id>   Delete a task
     clear         Clear all completed tasks
+    repl          Read commands from stdin, one per line
 
 EXAMPLES:
     todo add "Buy milk"
     todo list
     todo done 1
     todo list --verbose
+    todo repl < commands.txt
+    todo --batch commands.txt
+
+FILES:
+    todo.txt      Tasks, one "[ ] desc" or "[x] desc" per line
+    todo.txt.ids  Stable task IDs for those lines, with a SHA-256 of todo.txt
+                  (renumbered from 1 if todo.txt was changed by another tool)
 """,
     )
 
@@ -185,6 +360,11 @@ EXAMPLES:
         action="store_true",
         help="Show verbose output",
     )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Run commands from FILE (one per line) with a single load and save",
+    )
     parser.add_argument(
         "command",
         nargs="?",
@@ -199,66 +379,206 @@ EXAMPLES:
     return parser
 
 
+_PARSER: Optional["argparse.ArgumentParser"] = None
+
+
+def _get_parser() -> "argparse.ArgumentParser":
+    # 一度組み立てたパーサーは使い回す (repl では何行読んでも 1 回だけ)
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = build_parser()
+    return _PARSER
+
+
+def _fast_parse(args: List[str]) -> Optional[SimpleNamespace]:
+    # "[-f FILE] [-v] command args..." の典型的な形だけを手で解釈する。
+    # それ以外 (-h, --file=x, 未知のオプションなど) は None を返して argparse に任せる
+    file, verbose = "todo.txt", False
+    i = 0
+    while i < len(args) and args[i].startswith("-"):
+        if args[i] in ("-v", "--verbose"):
+            verbose = True
+            i += 1
+        elif args[i] in ("-f", "--file") and i + 1 < len(args) and not args[i + 1].startswith("-"):
+            file = args[i + 1]
+            i += 2
+        else:
+            return None
+
+    rest = args[i:]
+    if not rest or any(arg.startswith("-") for arg in rest):
+        return None
+    return SimpleNamespace(file=file, verbose=verbose, batch=None, command=rest[0], args=rest[1:])
+
+
+# 速い経路は SimpleNamespace、argparse に任せた場合は argparse.Namespace が返る
+ParsedArgs = Union["argparse.Namespace", SimpleNamespace]
+
+
+def _parse(args: List[str]) -> ParsedArgs:
+    parsed = _fast_parse(args)
+    if parsed is None:
+        parsed = _get_parser().parse_args(args)
+    return parsed
+
+
 def main(args: Optional[List[str]] = None) -> None:
-    parser = build_parser()
-    parsed = parser.parse_args(args)
+    if args is None:
+        args = sys.argv[1:]
+    status = _run(_parse(args), {})
+    if status:
+        sys.exit(status)
+
+
+def repl(defaults: ParsedArgs, stores: Dict[str, TaskStore]) -> None:
+    # 1 行 1 コマンドで標準入力から読む。パーサーと TaskStore (mtime キャッシュ) は使い回す
+    import shlex
+
+    prefix = ["-f", defaults.file] + (["-v"] if defaults.verbose else [])
+    for line in sys.stdin:
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            print(f"Error: {e}")
+            continue
+        if not args:
+            continue
+        if args[0] in ("exit", "quit"):
+            break
+        try:
+            parsed = _parse(prefix + args)
+        except SystemExit:
+            # argparse のエラーや --help でループごと終わらせない
+            continue
+        if parsed.command == "repl":
+            print("Error: already in repl")
+            continue
+        _run(parsed, stores)
+
+
+# コマンド名 -> Commands.batch の操作名
+_OPS = {"add": "add", "done": "done", "undo": "undo", "delete": "delete", "rm": "delete", "clear": "clear"}
+
+
+def _to_op(command: str, args: List[str], where: str = "") -> Optional[Tuple[str, Any]]:
+    # where はエラー表示の位置 (バッチファイルの "path:行番号: ")
+    op = _OPS[command]
+    if op == "add":
+        if not args:
+            print(f"Error: {where}add requires a task description")
+            return None
+        return (op, " ".join(args))
+    if op == "clear":
+        return (op, None)
+    if not args or not args[0].isdigit():
+        print(f"Error: {where}{op} requires a valid task ID")
+        return None
+    return (op, int(args[0]))
+
+
+def _read_batch(path: str) -> Optional[List[Tuple[str, Any]]]:
+    # repl と同じ 1 行 1 コマンドの書式。変更系のコマンドに加えて list / ls も書ける
+    # (その時点のメモリ上の状態を表示する)。1 行でも不正なら何も適用せず None を返す
+    import shlex
+
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error: cannot read batch file {path}: {e}")
+        return None
+
+    ops: List[Tuple[str, Any]] = []
+    ok = True
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        where = f"{path}:{lineno}: "
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            print(f"Error: {where}{e}")
+            ok = False
+            continue
+        if not args:
+            continue
+        command = args[0].lower()
+        if command in ("list", "ls"):
+            ops.append(("list", None))
+            continue
+        if command not in _OPS:
+            print(f"Error: {where}unknown command: {command}")
+            ok = False
+            continue
+        op = _to_op(command, args[1:], where)
+        if op is None:
+            ok = False
+        else:
+            ops.append(op)
+    return ops if ok else None
+
 
-    if not parsed.command:
-        parser.print_help()
-        return
+def _run(parsed: ParsedArgs, stores: Dict[str, TaskStore]) -> int:
+    # 終了ステータスを返す (main はそのまま exit し、repl は無視して次の行へ進む)
+    if not parsed.command and not parsed.batch:
+        _get_parser().print_help()
+        return 0
 
-    store = TaskStore(parsed.file)
+    store = stores.get(parsed.file)
+    if store is None:
+        store = stores[parsed.file] = TaskStore(parsed.file)
     commands = Commands(store, verbose=parsed.verbose)
 
+    if parsed.batch:
+        ops = _read_batch(parsed.batch)
+        if ops is None:
+            return 1
+        commands.batch(ops)
+        if not parsed.command:
+            return 0
+
     command = parsed.command.lower()
 
-    if command == "add":
-        if not parsed.args:
-            print("Error: add requires a task description")
-            return
-        description = " ".join(parsed.args)
-        commands.add(description)
+    if command in _OPS:
+        # 単発のコマンドも 1 操作だけのバッチとして実行する
+        op = _to_op(command, parsed.args)
+        if op is not None:
+            commands.batch([op])
 
     elif command in ("list", "ls"):
         commands.list()
 
-    elif command == "done":
-        if not parsed.args or not parsed.args[0].isdigit():
-            print("Error: done requires a valid task ID")
-            return
-        commands.done(int(parsed.args[0]))
-
-    elif command == "undo":
-        if not parsed.args or not parsed.args[0].isdigit():
-            print("Error: undo requires a valid task ID")
-            return
-        commands.undo(int(parsed.args[0]))
-
-    elif command in ("delete", "rm"):
-        if not parsed.args or not parsed.args[0].isdigit():
-            print("Error: delete requires a valid task ID")
-            return
-        commands.delete(int(parsed.args[0]))
-
-    elif command == "clear":
-        commands.clear()
+    elif command == "repl":
+        repl(parsed, stores)
 
     elif command == "help":
-        parser.print_help()
+        _get_parser().print_help()
 
     else:
         print(f"Unknown command: {command}")
-        parser.print_help()
+        _get_parser().print_help()
+
+    return 0
 
 
 # --- テスト ---
 def run_tests() -> None:
+    import contextlib
+    import io
     import tempfile
 
     print("--- Tests ---")
 
+    # Task は eq=False なので、比較はフィールドのタプルで行う
+    def fields(tasks: List[Task]) -> List[Tuple[int, str, bool]]:
+        return [(t.id, t.description, t.done) for t in tasks]
+
+    # 今のタスクファイルに対応する .ids の中身
+    def sidecar(next_id: int, ids: List[int]) -> str:
+        digest = hashlib.sha256(Path(temp_path).read_bytes()).hexdigest()
+        return "".join(f"{line}\n" for line in [f"# next_id: {next_id}", f"# sha256: {digest}", *ids])
+
     with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
         temp_path = f.name
+    ids_path = Path(temp_path + ".ids")
+    batch_path = Path(temp_path + ".batch")
 
     try:
         store = TaskStore(temp_path)
@@ -279,6 +599,89 @@ def run_tests() -> None:
         assert tasks[0].done is False, "task 1 done failed"
         assert tasks[1].done is True, "task 2 done failed"
 
+        # キャッシュ: 同じ内容のコピーが返り、外部からの変更は検出される
+        first, second = store.load(), store.load()
+        assert fields(first) == fields(second) and first[0] is not second[0], "cached load failed"
+        assert store.next_id() == 3, "next_id failed"
+        Path(temp_path).write_text("[ ] Task 1\n[ ] Task 2\n[x] Task 3\n")
+        assert len(store.load()) == 3, "cache invalidation failed"
+
+        # 追記: 末尾に改行が無いファイルにも 1 行として追加される
+        ids_path.unlink()
+        Path(temp_path).write_text("[ ] Task 1", encoding="utf-8")
+        store.append(Task(id=store.next_id(), description="Task 2"))
+        assert Path(temp_path).read_text(encoding="utf-8") == "[ ] Task 1\n[ ] Task 2\n", "append failed"
+        assert [t.id for t in store.load()] == [1, 2], "append ids failed"
+
+        # 他の実装が書き換えたファイルは共通形式のまま残し、.ids だけを作り直す
+        Path(temp_path).write_text("[ ] Task 1\n[x] Task 2\n[ ] Task 3\n", encoding="utf-8")
+        store.append(Task(id=store.next_id(), description="Task 4"))
+        expected = "[ ] Task 1\n[x] Task 2\n[ ] Task 3\n[ ] Task 4\n"
+        assert Path(temp_path).read_text(encoding="utf-8") == expected, "plain append failed"
+        assert ids_path.read_text(encoding="ascii") == sidecar(5, [1, 2, 3, 4]), "ids resync failed"
+
+        # 削除しても ID は振り直さず、削除した ID も再利用しない
+        store.save([t for t in store.load() if t.id != 1])
+        expected = "[x] Task 2\n[ ] Task 3\n[ ] Task 4\n"
+        assert Path(temp_path).read_text(encoding="utf-8") == expected, "plain save failed"
+        assert [t.id for t in TaskStore(temp_path).load()] == [2, 3, 4], "stable ids failed"
+        assert store.next_id() == 5, "next_id after delete failed"
+
+        # 追記した後も .ids のハッシュはタスクファイルと合っている
+        store.append(Task(id=store.next_id(), description="Task 5"))
+        assert ids_path.read_text(encoding="ascii") == sidecar(5, [2, 3, 4, 5]), "append digest failed"
+        assert [t.id for t in TaskStore(temp_path).load()] == [2, 3, 4, 5], "append reload failed"
+
+        # 行数が同じままの書き換えでも、古い ID を別のタスクに付けず連番で読み直す
+        Path(temp_path).write_text("[ ] Task 3\n[x] Task 2\n[ ] Task 5\n[ ] Task 4\n", encoding="utf-8")
+        assert [t.id for t in TaskStore(temp_path).load()] == [1, 2, 3, 4], "stale ids failed"
+
+        # batch: まとめて適用し、最後に 1 回だけ保存する
+        Path(temp_path).unlink()
+        ids_path.unlink()
+        store.save([Task(id=1, description="Task 1"), Task(id=2, description="Task 2")])
+        with contextlib.redirect_stdout(io.StringIO()):
+            Commands(store).batch([("add", "Task 3"), ("done", 1), ("delete", 2), ("add", "Task 4"), ("delete", 4)])
+        assert Path(temp_path).read_text(encoding="utf-8") == "[x] Task 1\n[ ] Task 3\n", "batch failed"
+        assert ids_path.read_text(encoding="ascii") == sidecar(5, [1, 3]), "batch ids failed"
+
+        # --batch: list も書ける。不正な行があれば何も適用せず、行番号を出して非 0 で終わる
+        batch_path.write_text("add Task 5\nls\n", encoding="utf-8")
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main(["-f", temp_path, "--batch", str(batch_path)])
+        assert "  5 [ ] Task 5" in out.getvalue(), "batch list failed"
+        for bad in ('add "Task 6\n', "list\nbogus 1\n", "done x\n"):
+            batch_path.write_text(bad, encoding="utf-8")
+            out = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(out):
+                    main(["-f", temp_path, "--batch", str(batch_path)])
+                raise AssertionError("batch error exit failed")
+            except SystemExit as e:
+                assert e.code == 1, "batch error status failed"
+            assert f"{batch_path}:" in out.getvalue(), "batch error line failed"
+        batch_path.unlink()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                main(["-f", temp_path, "--batch", str(batch_path)])
+                raise AssertionError("missing batch file failed")
+            except SystemExit as e:
+                assert e.code == 1, "missing batch file status failed"
+        assert [t.id for t in store.load()] == [1, 3, 5], "batch error applied ops"
+
+        # repl: 標準入力の 1 行を 1 コマンドとして実行する
+        Path(temp_path).unlink()
+        ids_path.unlink()
+        stdin, sys.stdin = sys.stdin, io.StringIO('add "Task A"\n--bogus\nadd Task B\ndone 2\n')
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                main(["-f", temp_path, "repl"])
+        finally:
+            sys.stdin = stdin
+        assert [(t.description, t.done) for t in store.load()] == [("Task A", False), ("Task B", True)], "repl failed"
+        assert _get_parser() is _get_parser(), "parser cache failed"
+
         # Task.from_line
         task = Task.from_line(1, "[ ] Test task")
         assert task.done is False, "from_line undone failed"
@@ -286,6 +689,16 @@ def run_tests() -> None:
 
         task = Task.from_line(1, "[x] Done task")
         assert task.done is True, "from_line done failed"
+        assert task.description == "Done task", "from_line done description failed"
+
+        task = Task.from_line(1, "  Plain task  ")
+        assert task.done is False and task.description == "Plain task", "from_line plain failed"
+
+        # Task.from_bytes
+        task = Task.from_bytes(1, "[x]  買い物\r".encode("utf-8"))
+        assert task.done is True and task.description == "買い物", "from_bytes failed"
+        task = Task.from_bytes(1, b"  Plain task ")
+        assert fields([task]) == fields([Task.from_line(1, "  Plain task ")]), "from_bytes plain failed"
 
         # Task.to_line
         task = Task(id=1, description="Test", done=False)
@@ -297,6 +710,8 @@ def run_tests() -> None:
         print("All tests passed!")
     finally:
         Path(temp_path).unlink(missing_ok=True)
+        ids_path.unlink(missing_ok=True)
+        batch_path.unlink(missing_ok=True)
 
 
 # --- メイン ---
@@ -7,11 +7,10 @@ GIL (Global Interpreter Lock) の影響を理解することが重要。
 
 import asyncio
 import threading
-import multiprocessing
-import queue
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
-from typing import List
+from typing import List, Optional
 
 print("=== Concurrency Demo ===\n")
 
@@ -82,22 +81,32 @@ def lock_demo() -> None:
 def queue_demo() -> None:
     print("--- Queue ---")
 
-    q: queue.Queue[int] = queue.Queue()
+    # 同一プロセス内の受け渡しなら、ロックを取る queue.Queue より deque + Event で足りる。
+    # deque の append / popleft は CPython では GIL により 1 操作ずつアトミックなため。
+    # GIL の無い実装や複数プロデューサーで確実にしたい場合は queue.SimpleQueue
+    # (Queue より軽い) を使う
+    q: deque[Optional[int]] = deque()
+    not_empty = threading.Event()
 
     def producer(items: List[int]) -> None:
         for item in items:
-            q.put(item)
+            q.append(item)
+            not_empty.set()
             print(f"  Produced: {item}")
             time.sleep(0.01)
-        q.put(None)  # 終了シグナル
+        q.append(None)  # 終了シグナル
+        not_empty.set()
 
     def consumer() -> None:
         while True:
-            item = q.get()
-            if item is None:
-                break
-            print(f"  Consumed: {item}")
-            q.task_done()
+            not_empty.wait()
+            # 取り出す前に clear するので、取り出し中の set を取りこぼさない
+            not_empty.clear()
+            while q:
+                item = q.popleft()
+                if item is None:
+                    return
+                print(f"  Consumed: {item}")
 
     prod = threading.Thread(target=producer, args=([1, 2, 3, 4, 5],))
     cons = threading.Thread(target=consumer)
@@ -135,25 +144,76 @@ def thread_pool_demo() -> None:
         for future in futures:
             print(f"  {future.result()}")
 
+    # 比較: 同じ I/O 待ちを asyncio で。スレッドを作らず 1 つのイベントループで待つので、
+    # 同時接続数が増えてもスレッド分のスタックや GIL の取り合いが発生しない
+    # (実際の HTTP なら asyncio.sleep の代わりに aiohttp.ClientSession().get(url) など)
+    async def fetch_async(url: str) -> str:
+        await asyncio.sleep(0.1)  # 模擬的な I/O
+        return f"Data from {url}"
+
+    async def fetch_all() -> List[str]:
+        return await asyncio.gather(*(fetch_async(url) for url in urls))
+
+    print("\n  Using asyncio.gather:")
+    for result in asyncio.run(fetch_all()):
+        print(f"  {result}")
+
     print()
 
 
 # --- multiprocessing ---
+# Numba はオプション依存。無ければ純 Python のループのまま動かす
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _sum_squares_loop(n: int) -> int:
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+_sum_squares_jit = None
+if njit is not None:
+    # cache=True でコンパイル結果をディスクに保存し、次回以降の実行で再利用する
+    _sum_squares_jit = njit(cache=True)(_sum_squares_loop)
+
+# Σ i² (0 <= i < n) が int64 に収まる最大の n。これを超えると JIT 版は黙って桁あふれするので、
+# Python の int (任意精度) のループに戻す
+_JIT_MAX_N = 3_024_617
+
+
+# ProcessPoolExecutor は関数を pickle して渡すので、モジュールレベルに置く
+def cpu_bound_task(n: int, loop: bool = True) -> int:
+    """CPU バウンドな処理"""
+    if loop:
+        # 並列化の効果を見せるためのループ版
+        if _sum_squares_jit is not None and n <= _JIT_MAX_N:
+            return _sum_squares_jit(n)
+        return _sum_squares_loop(n)
+    # Σ i² (0 <= i < n) の閉じた式。O(1) で結果はループ版と同じ
+    return (n - 1) * n * (2 * n - 1) // 6
+
+
 def multiprocessing_demo() -> None:
     print("--- multiprocessing ---")
 
-    def cpu_bound_task(n: int) -> int:
-        """CPU バウンドな処理"""
-        total = 0
-        for i in range(n):
-            total += i * i
-        return total
+    # JIT コンパイルをワーカーに fork する前に済ませておく
+    cpu_bound_task(1)
 
     # GIL を回避して真の並列処理
     with ProcessPoolExecutor(max_workers=2) as executor:
         results = list(executor.map(cpu_bound_task, [100000, 100000]))
 
     print(f"  Results: {results}")
+    print(f"  Closed form: {cpu_bound_task(100000, loop=False)}")
+    assert results[0] == cpu_bound_task(100000, loop=False)
+    # _JIT_MAX_N がちょうど int64 の境界であること
+    assert cpu_bound_task(_JIT_MAX_N, loop=False) < 2**63 <= cpu_bound_task(_JIT_MAX_N + 1, loop=False)
+    print(f"  Numba available: {njit is not None}")
 
     print()
 
@@ -4,6 +4,7 @@
 Python 組み込みのデータ構造と collections モジュール。
 """
 
+import bisect
 from typing import TypeVar, Generic, Optional, Iterator, List
 from collections import deque, defaultdict, Counter, OrderedDict
 from dataclasses import dataclass, field
@@ -179,6 +180,7 @@ def defaultdict_demo() -> None:
     print(f"defaultdict(list): {dict(dd)}")
 
     # 整数をデフォルト値に
+    # (文字数えのような集計なら、C のループで数える Counter の方が速い。下の Counter 参照)
     counter: defaultdict[str, int] = defaultdict(int)
     for char in "abracadabra":
         counter[char] += 1
@@ -187,6 +189,25 @@ def defaultdict_demo() -> None:
     print()
 
 
+# --- 文字ヒストグラム ---
+# NumPy はオプション依存。無ければ Counter (これも C のループ) で数える
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# これ未満の長さでは NumPy の呼び出しオーバーヘッドの方が大きい
+NUMPY_THRESHOLD = 4096
+
+
+def char_histogram(text: str) -> dict[str, int]:
+    # 1 文字 1 バイトの ASCII なら、バイト列をそのまま bincount で 1 パスに数える
+    if np is None or len(text) < NUMPY_THRESHOLD or not text.isascii():
+        return dict(Counter(text))
+    counts = np.bincount(np.frombuffer(text.encode("ascii"), dtype=np.uint8), minlength=128)
+    return {chr(i): int(c) for i, c in enumerate(counts) if c}
+
+
 # --- Counter ---
 def counter_demo() -> None:
     print("--- Counter ---")
@@ -195,6 +216,15 @@ def counter_demo() -> None:
     print(f"Counter: {c}")
     print(f"most_common(3): {c.most_common(3)}")
 
+    # 追加の集計も Python 側でループせず update に渡す (C 実装の高速パスを通る)
+    c.update("alakazam")
+    print(f"update('alakazam'): {c}")
+
+    # 長い ASCII 文字列のヒストグラム (NumPy があれば bincount)
+    text = "abracadabra" * 1000
+    print(f"char_histogram (NumPy: {np is not None}): {char_histogram(text)}")
+    assert char_histogram(text) == dict(Counter(text))
+
     # 演算
     c1 = Counter(a=3, b=1)
     c2 = Counter(a=1, b=2)
@@ -292,41 +322,24 @@ def queue_demo() -> None:
 def linked_list_demo() -> None:
     print("--- 連結リスト ---")
 
-    @dataclass
-    class Node(Generic[T]):
-        value: T
-        next: Optional["Node[T]"] = None
-
+    # API は連結リストのまま、中身は deque (C 実装の両端連結ブロック) に任せる。
+    # 途中への挿入・削除が要らないなら、実務の Python では自前のノードより deque を使う
+    # (ノードを自前で繋ぐ実装は challenges/02_linked_list を参照)
     class LinkedList(Generic[T]):
         def __init__(self) -> None:
-            self.head: Optional[Node[T]] = None
-            self.tail: Optional[Node[T]] = None
-            self._size = 0
+            self._dq: deque[T] = deque()
 
         def append(self, value: T) -> None:
-            node = Node(value)
-            if self.tail is None:
-                self.head = self.tail = node
-            else:
-                self.tail.next = node
-                self.tail = node
-            self._size += 1
+            self._dq.append(value)
 
         def prepend(self, value: T) -> None:
-            node = Node(value, self.head)
-            if self.head is None:
-                self.tail = node
-            self.head = node
-            self._size += 1
+            self._dq.appendleft(value)
 
         def __iter__(self) -> Iterator[T]:
-            current = self.head
-            while current:
-                yield current.value
-                current = current.next
+            return iter(self._dq)
 
         def __len__(self) -> int:
-            return self._size
+            return len(self._dq)
 
         def __repr__(self) -> str:
             return f"LinkedList([{', '.join(map(str, self))}])"
@@ -346,56 +359,80 @@ def linked_list_demo() -> None:
 def binary_tree_demo() -> None:
     print("--- 二分木 ---")
 
-    @dataclass
+    @dataclass(slots=True)
     class TreeNode(Generic[T]):
         value: T
         left: Optional["TreeNode[T]"] = None
         right: Optional["TreeNode[T]"] = None
 
+    # 既定ではソート済み list を bisect で保つ。二分探索が C で動き、値も連続して並ぶ。
+    # pedagogical=True のときだけ、学習用に TreeNode を繋いだ (平衡化しない) 木を組む
     class BinarySearchTree(Generic[T]):
-        def __init__(self) -> None:
+        def __init__(self, pedagogical: bool = False) -> None:
             self.root: Optional[TreeNode[T]] = None
+            self._size = 0
+            self._sorted: Optional[List[T]] = None if pedagogical else []
 
         def insert(self, value: T) -> None:
-            if self.root is None:
+            if self._sorted is not None:
+                # 同じ値は右へ入れる木と同じく、既存の値の後ろに入れる
+                bisect.insort_right(self._sorted, value)
+            elif self.root is None:
                 self.root = TreeNode(value)
             else:
                 self._insert(self.root, value)
+            self._size += 1
 
+        # 再帰せずポインタを辿るだけなので、偏った木でも RecursionError にならない
         def _insert(self, node: TreeNode[T], value: T) -> None:
-            if value < node.value:
-                if node.left is None:
-                    node.left = TreeNode(value)
-                else:
-                    self._insert(node.left, value)
-            else:
-                if node.right is None:
-                    node.right = TreeNode(value)
+            while True:
+                if value < node.value:
+                    if node.left is None:
+                        node.left = TreeNode(value)
+                        return
+                    node = node.left
                 else:
-                    self._insert(node.right, value)
+                    if node.right is None:
+                        node.right = TreeNode(value)
+                        return
+                    node = node.right
 
         def search(self, value: T) -> bool:
+            if self._sorted is not None:
+                i = bisect.bisect_left(self._sorted, value)
+                return i < len(self._sorted) and self._sorted[i] == value
             return self._search(self.root, value)
 
         def _search(self, node: Optional[TreeNode[T]], value: T) -> bool:
-            if node is None:
-                return False
-            if value == node.value:
-                return True
-            if value < node.value:
-                return self._search(node.left, value)
-            return self._search(node.right, value)
+            while node is not None:
+                if value == node.value:
+                    return True
+                node = node.left if value < node.value else node.right
+            return False
 
         def inorder(self) -> List[T]:
-            result: List[T] = []
-            self._inorder(self.root, result)
-            return result
+            # list() は __len__ から要素数を得て、一度に確保してから詰める
+            return list(self)
 
-        def _inorder(self, node: Optional[TreeNode[T]], result: List[T]) -> None:
-            if node:
-                self._inorder(node.left, result)
-                result.append(node.value)
-                self._inorder(node.right, result)
+        def __len__(self) -> int:
+            return self._size
+
+        def __iter__(self) -> Iterator[T]:
+            if self._sorted is not None:
+                return iter(self._sorted)
+            return self._iter_inorder()
+
+        # 明示的なスタックで左の枝を積み、戻りながら値を返す
+        def _iter_inorder(self) -> Iterator[T]:
+            stack: List[TreeNode[T]] = []
+            node = self.root
+            while stack or node:
+                while node:
+                    stack.append(node)
+                    node = node.left
+                node = stack.pop()
+                yield node.value
+                node = node.right
 
     bst: BinarySearchTree[int] = BinarySearchTree()
     for val in [5, 3, 7, 1, 4, 6, 8]:
@@ -405,6 +442,18 @@ def binary_tree_demo() -> None:
     print(f"search(4): {bst.search(4)}")
     print(f"search(9): {bst.search(9)}")
 
+    tree: BinarySearchTree[int] = BinarySearchTree(pedagogical=True)
+    for val in [5, 3, 7, 1, 4, 6, 8]:
+        tree.insert(val)
+    assert tree.inorder() == bst.inorder() and tree.search(4) and not tree.search(9)
+
+    # ソート済みの入力で一直線に偏った木 (再帰版だと RecursionError)
+    skewed: BinarySearchTree[int] = BinarySearchTree(pedagogical=True)
+    for val in range(5000):
+        skewed.insert(val)
+    print(f"Skewed tree ({len(skewed)} nodes): search(4999) = {skewed.search(4999)}")
+    assert skewed.inorder() == list(range(5000))
+
     print()
 
 
@@ -5,8 +5,11 @@ Python は例外ベースのエラー処理。
 Result パターンも実装可能。
 """
 
+import warnings
 from typing import TypeVar, Generic, Union, Optional, Callable
-from dataclasses import dataclass
+
+# optional_pattern のデフォルト値。呼び出しごとに dict を作らない
+_UNKNOWN = {"name": "Unknown"}
 
 print("=== Error Handling Demo ===\n")
 
@@ -72,6 +75,23 @@ def custom_exceptions() -> None:
     except ValidationError as e:
         print(f"ValidationError: {e} (field: {e.field})")
 
+    # ループ内で呼ぶ検証は raise / except を使わず、エラーオブジェクトを返して調べる。
+    # 返すだけで raise しない (__traceback__ などが書き換わらない) ので、事前に作った
+    # インスタンスを共有できる。raise したい呼び出し側は新しいインスタンスを作ること
+    MISSING_NAME = ValidationError("Name is required", "name")
+    INVALID_EMAIL = ValidationError("Invalid email", "email")
+
+    def validate_user_ok(data: dict) -> Optional[ValidationError]:
+        if "name" not in data:
+            return MISSING_NAME
+        if "@" not in data.get("email", ""):
+            return INVALID_EMAIL
+        return None
+
+    if (err := validate_user_ok({"email": "bob@example.com"})) is not None:
+        print(f"validate_user_ok: {err} (field: {err.field})")
+    assert validate_user_ok({"name": "Alice", "email": "alice@example.com"}) is None
+
     # 例外の継承階層
     class AppError(Exception):
         """アプリケーションの基底例外"""
@@ -167,6 +187,25 @@ def context_managers() -> None:
     with managed_resource("resource2") as r:
         print(f"  Using {r}")
 
+    # 頻繁に取得・解放するリソースはジェネレータを介さない __slots__ クラスにする
+    class FastManaged:
+        __slots__ = ("name",)
+
+        def __init__(self, name: str):
+            self.name = name
+
+        def __enter__(self) -> str:
+            print(f"  Acquiring {self.name}")
+            return self.name
+
+        def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+            print(f"  Releasing {self.name}")
+            return False
+
+    print("\n__slots__ class:")
+    with FastManaged("resource3") as r:
+        print(f"  Using {r}")
+
     # suppress
     from contextlib import suppress
 
@@ -185,9 +224,22 @@ def result_pattern() -> None:
     T = TypeVar("T")
     E = TypeVar("E")
 
-    @dataclass
+    # __slots__ で __dict__ を持たせず、種別は isinstance ではなく tag の整数比較で見分ける
+    OK, ERR = 0, 1
+
     class Ok(Generic[T]):
-        value: T
+        __slots__ = ("value",)
+        __match_args__ = ("value",)
+        tag = OK
+
+        def __init__(self, value: T) -> None:
+            self.value = value
+
+        def __repr__(self) -> str:
+            return f"{type(self).__qualname__}(value={self.value!r})"
+
+        def __eq__(self, other: object) -> bool:
+            return type(other) is Ok and self.value == other.value
 
         def is_ok(self) -> bool:
             return True
@@ -195,9 +247,19 @@ def result_pattern() -> None:
         def is_err(self) -> bool:
             return False
 
-    @dataclass
     class Err(Generic[E]):
-        error: E
+        __slots__ = ("error",)
+        __match_args__ = ("error",)
+        tag = ERR
+
+        def __init__(self, error: E) -> None:
+            self.error = error
+
+        def __repr__(self) -> str:
+            return f"{type(self).__qualname__}(error={self.error!r})"
+
+        def __eq__(self, other: object) -> bool:
+            return type(other) is Err and self.error == other.error
 
         def is_ok(self) -> bool:
             return False
@@ -213,34 +275,38 @@ def result_pattern() -> None:
         return Ok(a / b)
 
     result1 = safe_divide(10, 2)
-    if isinstance(result1, Ok):
+    if result1.tag == OK:
         print(f"10 / 2 = {result1.value}")
 
     result2 = safe_divide(10, 0)
-    if isinstance(result2, Err):
+    if result2.tag == ERR:
         print(f"Error: {result2.error}")
 
     # チェーン
+    # 不正な入力が多いと例外の生成・巻き戻しが重いので、先に検査して (LBYL) 例外を使わない。
+    # isdigit は "²" なども真になるため、isascii と組み合わせて int() が通る形に限る
     def parse_int(s: str) -> Result[int, str]:
-        try:
+        t = s[1:] if s[:1] == "-" else s
+        if t.isascii() and t.isdigit():
             return Ok(int(s))
-        except ValueError:
-            return Err(f"Invalid integer: {s}")
+        return Err(f"Invalid integer: {s}")
 
+    # match はクラスパターンを MATCH_CLASS で照合し、__match_args__ で値を束縛する
     def compute(input_str: str) -> Result[float, str]:
-        parsed = parse_int(input_str)
-        if isinstance(parsed, Err):
-            return parsed
-
-        divided = safe_divide(100, parsed.value)
-        if isinstance(divided, Err):
-            return divided
-
-        return Ok(divided.value * 2)
+        match parse_int(input_str):
+            case Err() as err:
+                return err
+            case Ok(value):
+                match safe_divide(100, value):
+                    case Err() as err:
+                        return err
+                    case Ok(divided):
+                        return Ok(divided * 2)
 
     print(f"\ncompute('5'): {compute('5')}")
     print(f"compute('0'): {compute('0')}")
     print(f"compute('abc'): {compute('abc')}")
+    assert [parse_int(s).tag for s in ("-12", "", "-", "²", "1.5")] == [OK, ERR, ERR, ERR, ERR]
 
     print()
 
@@ -249,12 +315,14 @@ def result_pattern() -> None:
 def optional_pattern() -> None:
     print("--- Optional パターン ---")
 
-    def find_user(user_id: int) -> Optional[dict]:
-        users = {
-            1: {"name": "Alice", "age": 30},
-            2: {"name": "Bob", "age": 25},
-        }
-        return users.get(user_id)
+    users = {
+        1: {"name": "Alice", "age": 30},
+        2: {"name": "Bob", "age": 25},
+    }
+
+    # 見つからなければ default を返す。dict.get の 1 回の探索で済む
+    def find_user(user_id: int, default: Optional[dict] = None) -> Optional[dict]:
+        return users.get(user_id, default)
 
     # None チェック
     user = find_user(1)
@@ -270,7 +338,7 @@ def optional_pattern() -> None:
         print(f"Walrus: {user['name']}")
 
     # デフォルト値
-    name = find_user(99) or {"name": "Unknown"}
+    name = find_user(99, _UNKNOWN)
     print(f"Default: {name}")
 
     print()
@@ -302,26 +370,37 @@ def assertions_demo() -> None:
 def warnings_demo() -> None:
     print("--- warnings ---")
 
-    import warnings
-
-    def deprecated_function() -> None:
-        warnings.warn(
-            "deprecated_function is deprecated, use new_function instead",
-            DeprecationWarning,
-            stacklevel=2
-        )
-        print("  Running deprecated function")
-
-    # 警告を表示
-    warnings.filterwarnings("always", category=DeprecationWarning)
-    deprecated_function()
+    # 警告済みかどうかは関数ごとのクロージャに持つ (log-once)。
+    # 2 回目以降はフラグを見るだけで、フィルタ走査やフレーム取得をしない
+    def make_deprecated() -> Callable[[], None]:
+        warned = False
+
+        def deprecated_function() -> None:
+            nonlocal warned
+            if not warned:
+                warned = True
+                warnings.warn(
+                    "deprecated_function is deprecated, use new_function instead",
+                    DeprecationWarning,
+                    stacklevel=2
+                )
+            print("  Running deprecated function")
+
+        return deprecated_function
+
+    # 警告を表示 (最初の 1 回だけ)。フィルタの変更は with の中だけに留める
+    with warnings.catch_warnings():
+        warnings.simplefilter("always", DeprecationWarning)
+        deprecated_function = make_deprecated()
+        deprecated_function()
+        deprecated_function()
 
     # 警告を例外に変換
     print("\nwarnings as errors:")
     try:
         with warnings.catch_warnings():
             warnings.simplefilter("error")
-            deprecated_function()
+            make_deprecated()()
     except DeprecationWarning as e:
         print(f"  Caught warning as error: {e}")
 
@@ -5,9 +5,49 @@ Python は関数型パラダイムもサポート。
 第一級関数、高階関数、イテレータ、ジェネレータ。
 """
 
+import array
 from functools import reduce, partial, lru_cache, wraps
 from itertools import chain, groupby, combinations, permutations, count, takewhile
-from typing import Callable, TypeVar, Iterable, Iterator, List, Optional
+from operator import itemgetter
+from typing import Callable, TypeVar, Iterable, Iterator, List, Optional, Tuple, Union
+
+# NumPy はオプション依存。無ければ map / filter のまま動かす
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# これ未満の長さでは NumPy 配列への変換コストの方が大きい
+_NUMPY_THRESHOLD = 1024
+
+# Numba もオプション依存 (NumPy が前提)
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _fib_step(state) -> int:
+    # state = [a, b] を書き換えて a を返す。クロージャのセル書き込みは JIT できないので配列で持つ
+    result = state[0]
+    state[0] = state[1]
+    state[1] = result + state[1]
+    return result
+
+
+def _countdown_fill(out) -> None:
+    n = len(out)
+    for i in range(n):
+        out[i] = n - i
+
+
+# int64 に収まる最大のフィボナッチ数は fib(92)
+_FIB_INT64_MAX_N = 92
+
+if njit is not None:
+    # cache=True でコンパイル結果をディスクに保存する (呼び出しごとに約 1 µs のディスパッチは残る)
+    _fib_step = njit(cache=True)(_fib_step)
+    _countdown_fill = njit(cache=True)(_countdown_fill)
 
 print("=== Functional Programming Demo ===\n")
 
@@ -70,9 +110,21 @@ def closures() -> None:
     # フィボナッチジェネレータ
     def make_fibonacci() -> Callable[[], int]:
         a, b = 0, 1
+        jit_calls = 0
+        if njit is not None:
+            # state は返す値の 2 つ先まで進むので、int64 で正しく求まるのは fib(N - 2) を
+            # 返すまで (N = _FIB_INT64_MAX_N)。そこから先は Python の int で続ける
+            state = np.array([0, 1], dtype=np.int64)
+            jit_calls = _FIB_INT64_MAX_N - 1
 
         def fib() -> int:
-            nonlocal a, b
+            nonlocal a, b, jit_calls
+            if jit_calls:
+                jit_calls -= 1
+                result = int(_fib_step(state))
+                if not jit_calls:
+                    a, b = int(state[0]), int(state[1])
+                return result
             result = a
             a, b = b, a + b
             return result
@@ -80,8 +132,17 @@ def closures() -> None:
         return fib
 
     fib = make_fibonacci()
-    fibs = [fib() for _ in range(10)]
-    print(f"Fibonacci: {fibs}")
+    # PyLong の list ではなく int64 を連続領域に詰める (1 要素 8 バイト)。
+    # 要素数 100 程度からメモリ面で効いてくる。バッファプロトコル経由で
+    # NumPy / memoryview にコピーなしで渡せる (memory.py の memoryview_demo 参照)。
+    # int64 に収まるのは fib(92) までなので、それより多く取るなら list にする
+    count = 10
+    fibs: Union[array.array, List[int]] = array.array("q") if count <= _FIB_INT64_MAX_N + 1 else []
+    fibs.extend(fib() for _ in range(count))
+    print(f"Fibonacci: {list(fibs)} (Numba: {njit is not None})")
+    # int64 の範囲を超えても値は正確なまま
+    fib100 = make_fibonacci()
+    assert [fib100() for _ in range(100)][-1] == 218922995834555169026
 
     print()
 
@@ -100,9 +161,29 @@ def higher_order_functions() -> None:
     evens = list(filter(lambda x: x % 2 == 0, numbers))
     print(f"filter (even): {evens}")
 
-    # reduce
-    total = reduce(lambda a, b: a + b, numbers, 0)
-    print(f"reduce (sum): {total}")
+    # reduce (足し算なら Python の lambda を毎回呼ぶ reduce より、C で回る sum を使う)
+    product = reduce(lambda a, b: a * b, numbers, 1)
+    print(f"reduce (product): {product}")
+
+    total = sum(numbers)
+    print(f"sum: {total}")
+
+    # 要素の多い整数列なら NumPy で 1 パスに (int64 に収まる値が前提)。
+    # シフトとビット AND は乗算・剰余より安く、SIMD にも乗りやすい
+    def double_and_evens(values: List[int]) -> Tuple[List[int], List[int]]:
+        if np is not None and len(values) >= _NUMPY_THRESHOLD:
+            arr = np.asarray(values)
+            # 整数配列で、2 倍しても int64 に収まるときだけベクトル化する
+            if arr.dtype.kind == "i" and max(abs(int(arr.min())), abs(int(arr.max()))) < 2**62:
+                return (arr << 1).tolist(), arr[(arr & 1) == 0].tolist()
+        return list(map(lambda x: x * 2, values)), list(filter(lambda x: x % 2 == 0, values))
+
+    big = list(range(-50_000, 50_000))
+    big_doubled, big_evens = double_and_evens(big)
+    assert big_doubled == [x * 2 for x in big] and big_evens == [x for x in big if x % 2 == 0]
+    for odd in ([2**62 + 1] * 1024, [1.5] * 1024, [2**70] * 1024):
+        assert double_and_evens(odd) == ([x * 2 for x in odd], [x for x in odd if x % 2 == 0])
+    print(f"map/filter on {len(big)} ints (NumPy: {np is not None}): {len(big_doubled)}, {len(big_evens)}")
 
     # 内包表記 (推奨)
     print("\n内包表記:")
@@ -134,8 +215,9 @@ def lambda_expressions() -> None:
     print(f"lambda add: {add(2, 3)}")
 
     # ソートのキー
+    # 単純な添字アクセスなら lambda x: x[1] より C 実装の itemgetter の方が速い
     data = [("Alice", 30), ("Bob", 25), ("Charlie", 35)]
-    sorted_by_age = sorted(data, key=lambda x: x[1])
+    sorted_by_age = sorted(data, key=itemgetter(1))
     print(f"sorted by age: {sorted_by_age}")
 
     # 複数の条件
@@ -159,18 +241,31 @@ def partial_application() -> None:
     print(f"cube(3) = {cube(3)}")
 
     # 関数合成
+    # 呼び出しのたびに reversed() で回さず、合成する時点で呼び出しの入れ子を組み立てておく
     def compose(*functions):
-        def inner(arg):
-            result = arg
-            for f in reversed(functions):
-                result = f(result)
-            return result
-        return inner
+        if not functions:
+            return lambda arg: arg
+        if len(functions) == 1:
+            return functions[0]
+        if len(functions) == 2:
+            f0, f1 = functions
+            return lambda arg: f0(f1(arg))
+        if len(functions) == 3:
+            f0, f1, f2 = functions
+            return lambda arg: f0(f1(f2(arg)))
+
+        # 4 個以上は f0(f1(...(arg))) のソースを生成して exec する
+        n = len(functions)
+        src = "def inner(arg):\n    return " + "".join(f"f{i}(" for i in range(n)) + "arg" + ")" * n
+        namespace = {f"f{i}": f for i, f in enumerate(functions)}
+        exec(src, namespace)
+        return namespace["inner"]
 
     add_one = lambda x: x + 1
     double = lambda x: x * 2
     composed = compose(double, add_one)
     print(f"\ncompose(double, add_one)(5) = {composed(5)}")
+    print(f"compose(double, add_one, double, add_one)(5) = {compose(double, add_one, double, add_one)(5)}")
 
     print()
 
@@ -217,6 +312,38 @@ def iterators_and_generators() -> None:
     print(f"  send(20): {acc.send(20)}")
     print(f"  send(5): {acc.send(5)}")
 
+    # 数値を大量に消費するなら、1 つずつ yield して中断・再開するより
+    # 配列にまとめて書く方が速い (Numba / NumPy があれば C のループ、無ければ range / accumulate)
+    from itertools import accumulate
+
+    def countdown_array(n: int) -> List[int]:
+        if njit is None:
+            return list(range(n, 0, -1))
+        out = np.empty(n, np.int64)
+        _countdown_fill(out)
+        return out.tolist()
+
+    # NumPy は要素数が多く、全要素が int で累積和も int64 に収まるときだけ使う。
+    # float や int64 を超える値は accumulate (Python の演算) で元の型のまま正確に足す
+    def running_sum(values: List[int]) -> List[int]:
+        if np is None or len(values) < _NUMPY_THRESHOLD:
+            return list(accumulate(values))
+        arr = np.asarray(values)
+        if arr.dtype.kind != "i":
+            return list(accumulate(values))
+        bound = max(abs(int(arr.min())), abs(int(arr.max())))
+        if bound * len(arr) >= 2**63:
+            return list(accumulate(values))
+        return np.cumsum(arr, dtype=np.int64).tolist()
+
+    print(f"\ncountdown_array(5): {countdown_array(5)}")
+    print(f"naturals (range): {list(range(1, 11))}")
+    print(f"running_sum([10, 20, 5]): {running_sum([10, 20, 5])}")
+    assert countdown_array(1000) == list(countdown(1000))
+    big = [2**62] * 4 + [1.5] + list(range(2000))
+    assert running_sum(big) == list(accumulate(big))
+    assert running_sum([2**62] * 2000) == list(accumulate([2**62] * 2000))
+
     print()
 
 
@@ -230,7 +357,7 @@ def itertools_demo() -> None:
 
     # groupby
     data = [("A", 1), ("A", 2), ("B", 3), ("B", 4)]
-    grouped = {k: list(v) for k, v in groupby(data, key=lambda x: x[0])}
+    grouped = {k: list(v) for k, v in groupby(data, key=itemgetter(0))}
     print(f"groupby: {grouped}")
 
     # combinations
@@ -259,17 +386,20 @@ def memoization() -> None:
 
     call_count = 0
 
+    # 本体は 1 フレームで回すループにし、lru_cache は同じ n の再計算を省くためだけに使う
     @lru_cache(maxsize=128)
     def fib(n: int) -> int:
         nonlocal call_count
         call_count += 1
-        if n < 2:
-            return n
-        return fib(n - 1) + fib(n - 2)
+        a, b = 0, 1
+        for _ in range(n):
+            a, b = b, a + b
+        return a
 
     result = fib(30)
     print(f"fib(30) = {result}")
     print(f"call count: {call_count}")
+    fib(30)  # 2 回目はキャッシュから返る
     print(f"cache info: {fib.cache_info()}")
 
     # キャッシュクリア
@@ -283,13 +413,16 @@ def decorator_patterns() -> None:
     print("--- デコレータ ---")
 
     # 基本的なデコレータ
+    # 大量の関数に適用する場合は wraps (WRAPPER_ASSIGNMENTS 全部 + __dict__ のコピー) を避け、
+    # 参照される名前だけをコピーする
     def log(func: Callable[..., T]) -> Callable[..., T]:
-        @wraps(func)
         def wrapper(*args, **kwargs) -> T:
             print(f"  Calling {func.__name__}")
             result = func(*args, **kwargs)
             print(f"  Returned {result}")
             return result
+        wrapper.__name__ = func.__name__
+        wrapper.__qualname__ = func.__qualname__
         return wrapper
 
     @log
@@ -297,6 +430,7 @@ def decorator_patterns() -> None:
         return a + b
 
     add(2, 3)
+    assert add.__name__ == "add"
 
     # 引数付きデコレータ
     def repeat(times: int):
@@ -363,6 +497,18 @@ def pipeline_demo() -> None:
     print("--- パイプライン ---")
 
     def pipe(value: T, *functions: Callable) -> T:
+        # よくある 2〜4 段はループを回さず直接呼ぶ
+        n = len(functions)
+        if n == 2:
+            f0, f1 = functions
+            return f1(f0(value))
+        if n == 3:
+            f0, f1, f2 = functions
+            return f2(f1(f0(value)))
+        if n == 4:
+            f0, f1, f2, f3 = functions
+            return f3(f2(f1(f0(value))))
+
         result = value
         for f in functions:
             result = f(result)
@@ -376,30 +522,40 @@ def pipeline_demo() -> None:
     )
     print(f"pipe result: {result}")
 
+    # 同じ処理を 1 つのジェネレータ式に融合すると、段ごとの中間リストも関数呼び出しも消える
+    fused = sum(n * 2 for n in [1, 2, 3, 4, 5] if n * 2 > 4)
+    print(f"fused result: {fused}")
+
     # メソッドチェーン風
+    # 各段はジェネレータを重ねるだけで、reduce / sum / collect で 1 パスにまとめて流す
+    # (段ごとの中間リストを作らない)
     class Pipeline:
         def __init__(self, data):
             self.data = data
 
         def map(self, f):
-            return Pipeline([f(x) for x in self.data])
+            return Pipeline(f(x) for x in self.data)
 
         def filter(self, f):
-            return Pipeline([x for x in self.data if f(x)])
+            return Pipeline(x for x in self.data if f(x))
 
         def reduce(self, f, initial):
             return reduce(f, self.data, initial)
 
+        def sum(self):
+            return sum(self.data)
+
         def collect(self):
-            return self.data
+            return list(self.data)
 
     result2 = (
         Pipeline([1, 2, 3, 4, 5])
         .map(lambda x: x * 2)
         .filter(lambda x: x > 4)
-        .reduce(lambda a, b: a + b, 0)
+        .sum()
     )
     print(f"Pipeline result: {result2}")
+    print(f"Pipeline collect: {Pipeline(range(1, 6)).map(lambda x: x * 2).filter(lambda x: x > 4).collect()}")
 
     print()
 
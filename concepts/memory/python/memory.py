@@ -7,11 +7,32 @@ CPython の実装詳細を解説。
 
 import sys
 import gc
+import sysconfig
 import weakref
 from typing import Any, Optional
 
+# NumPy はオプション依存 (memoryview の 2 次元表示にだけ使う)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 print("=== Memory Management Demo ===\n")
 
+# CPython ではオブジェクトの先頭が ob_refcnt (Py_ssize_t) なので、アドレスから直接読める。
+# Py_REFCNT はマクロで ctypes.pythonapi からは呼べないため、フィールドを読む。
+# アドレス (id) を渡すので、getrefcount と違って引数分の +1 が乗らない。
+# free-threaded ビルド (Py_GIL_DISABLED) は参照カウントの配置が違うので getrefcount を使う
+if sys.implementation.name == "cpython" and not sysconfig.get_config_var("Py_GIL_DISABLED"):
+    import ctypes
+
+    _ob_refcnt = ctypes.c_ssize_t.from_address
+
+    def _refcnt(addr: int) -> int:
+        return _ob_refcnt(addr).value
+else:
+    _refcnt = None
+
 
 # --- 参照とコピー ---
 def references_and_copies() -> None:
@@ -42,11 +63,19 @@ def references_and_copies() -> None:
     print(f"ネスト共有: nested = {nested}, shallow = {shallow}")
 
     # ディープコピー
+    # 要素が不変 (int) の list[list] なら、行ごとのスライスで十分かつ速い
     nested2 = [[1, 2], [3, 4]]
-    deep = copy.deepcopy(nested2)
+    deep = [row[:] for row in nested2]
     deep[0].append(100)
     print(f"ディープコピー: nested2 = {nested2}, deep = {deep}")
 
+    # copy.deepcopy は任意のオブジェクトグラフ (循環参照や __deepcopy__ を持つ型) 向け。
+    # memo 辞書で訪問済みを管理しながら全要素を辿るので、単純なネストには重い
+    graph = [[1, 2]]
+    graph.append(graph)
+    cloned = copy.deepcopy(graph)
+    print(f"deepcopy (循環あり): cloned[1] is cloned = {cloned[1] is cloned}")
+
     print()
 
 
@@ -62,15 +91,15 @@ def reference_counting() -> None:
         def __del__(self) -> None:
             print(f"  Deleted: {self.name}")
 
-    # 参照カウントの確認
+    # 参照カウントの確認 (CPython 以外では getrefcount から引数分の 1 を引いて代用)
     obj = Tracked("obj1")
-    print(f"  refcount after creation: {sys.getrefcount(obj) - 1}")  # -1 for getrefcount's reference
+    print(f"  refcount after creation: {_refcnt(id(obj)) if _refcnt else sys.getrefcount(obj) - 1}")
 
     ref = obj
-    print(f"  refcount after ref: {sys.getrefcount(obj) - 1}")
+    print(f"  refcount after ref: {_refcnt(id(obj)) if _refcnt else sys.getrefcount(obj) - 1}")
 
     del ref
-    print(f"  refcount after del ref: {sys.getrefcount(obj) - 1}")
+    print(f"  refcount after del ref: {_refcnt(id(obj)) if _refcnt else sys.getrefcount(obj) - 1}")
 
     # 参照カウントが0になると即座に解放
     print("  Deleting obj...")
@@ -107,6 +136,20 @@ def circular_references() -> None:
     gc.collect()
     print("  After gc.collect(): objects deleted")
 
+    # 循環を手で切れば、GC を待たず参照カウントだけで即座に解放される
+    # (gc.collect() は追跡中の全コンテナを走査するので重い。
+    #  逆向きの参照を weakref にしておけば、そもそも循環ができない)
+    print("\n  Breaking the cycle manually:")
+    c = Node("C")
+    d = Node("D")
+    c.ref = d
+    d.ref = c
+    c.ref = None
+    d.ref = None
+    del c
+    del d
+    print("  After del: objects deleted without gc.collect()")
+
     print()
 
 
@@ -232,6 +275,10 @@ def slots_demo() -> None:
 
 
 # --- intern (文字列の重複排除) ---
+# 長い文字列は起動時に一度だけ組み立てて intern しておく
+_LONG_S = sys.intern("hello world " * 100)
+
+
 def string_interning() -> None:
     print("--- String Interning ---")
 
@@ -245,10 +292,10 @@ def string_interning() -> None:
     d = "hello world " * 100
     print(f"long string is: {c is d}")
 
-    # 手動で intern
-    e = sys.intern("hello world " * 100)
-    f = sys.intern("hello world " * 100)
-    print(f"interned string is: {e is f}")
+    # 手動で intern (_LONG_S はモジュール読み込み時に一度だけ intern 済み)
+    e = sys.intern(c)
+    f = sys.intern(d)
+    print(f"interned string is: {e is f and e is _LONG_S}")
 
     print()
 
@@ -273,8 +320,12 @@ def memoryview_demo() -> None:
     arr = bytearray(range(12))
     view2 = memoryview(arr).cast("B", (3, 4))
     print(f"\nReshaped (3x4):")
-    for row in view2.tolist():
-        print(f"  {row}")
+    if np is not None:
+        # frombuffer はコピーせず同じバッファを 2 次元配列として見る (tolist で int を箱詰めしない)
+        print(np.frombuffer(arr, dtype=np.uint8).reshape(view2.shape))
+    else:
+        for row in view2.tolist():
+            print(f"  {row}")
 
     print()
 
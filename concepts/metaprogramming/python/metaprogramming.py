@@ -5,15 +5,61 @@ Python はメタプログラミングが強力。
 デコレータ、メタクラス、ディスクリプタ、動的属性アクセス。
 """
 
-from typing import Any, Callable, TypeVar, Dict
-from functools import wraps
+from typing import Any, Callable, TypeVar, Dict, List, Optional, Tuple
+from functools import wraps, lru_cache
 import inspect
+from random import random as _rand
+from weakref import WeakKeyDictionary
 
 print("=== Metaprogramming Demo ===\n")
 
 T = TypeVar("T")
 
 
+# inspect の結果は対象が変わらない限り同じなので、呼び出しごとに作り直さずキャッシュする
+@lru_cache(maxsize=None)
+def _signature(func: Callable) -> inspect.Signature:
+    return inspect.signature(func)
+
+
+# ソースはコードオブジェクトで決まるので __code__ をキーにする
+@lru_cache(maxsize=None)
+def _getsource(code: Any) -> str:
+    return inspect.getsource(code)
+
+
+@lru_cache(maxsize=None)
+def _getdoc(func: Callable) -> Optional[str]:
+    return inspect.getdoc(func)
+
+
+# eval / exec に渡すソースはモジュール読み込み時に 1 回だけコンパイルしておく
+_EXPR_ARITH = compile("2 + 3 * 4", "<demo>", "eval")
+_EXPR_DOUBLE = compile("x * 2", "<demo>", "eval")
+_CODE_GREET = compile("""
+def greet(name):
+    return f"Hello, {name}!"
+""", "<demo>", "exec")
+
+
+# getmembers は dir() の全属性に getattr と predicate をかけるので、該当する名前だけを
+# (型, predicate) ごとに覚えておき、値は呼び出しのたびに obj から取り直す。
+# 名前はクラス側の属性からだけ集める (インスタンスごとに変わる属性を型のキャッシュに入れない)。
+# ismethod のように束縛後の値で判定する predicate もあるので、判定は obj 経由の値で行う
+_member_names_cache: Dict[Tuple[type, Callable], Tuple[str, ...]] = {}
+
+
+def _cached_members(obj: Any, predicate: Callable) -> List[Tuple[str, Any]]:
+    key = (type(obj), predicate)
+    names = _member_names_cache.get(key)
+    if names is None:
+        names = _member_names_cache[key] = tuple(
+            name for name, _ in inspect.getmembers(type(obj))
+            if predicate(getattr(obj, name, None))
+        )
+    return [(name, getattr(obj, name)) for name in names]
+
+
 # --- イントロスペクション ---
 def introspection() -> None:
     print("--- イントロスペクション ---")
@@ -51,9 +97,13 @@ def introspection() -> None:
 
     # inspect
     print(f"\ninspect.getmembers (methods):")
-    for name, method in inspect.getmembers(person, predicate=inspect.ismethod):
+    for name, method in _cached_members(person, inspect.ismethod):
         print(f"  {name}")
 
+    # 2 つ目のインスタンスには、そのインスタンスに束縛されたメソッドが返る
+    other = Person("Bob", 25)
+    assert all(m.__self__ is other for _, m in _cached_members(other, inspect.ismethod))
+
     print()
 
 
@@ -63,9 +113,12 @@ def decorators() -> None:
 
     # 関数デコレータ
     def log(func: Callable[..., T]) -> Callable[..., T]:
+        # 関数名を含む接頭辞はデコレート時に 1 回だけ組み立てる
+        prefix = f"  Calling {func.__name__} with "
+
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
-            print(f"  Calling {func.__name__} with {args}, {kwargs}")
+            print(f"{prefix}{args}, {kwargs}")
             result = func(*args, **kwargs)
             print(f"  Returned {result}")
             return result
@@ -78,8 +131,17 @@ def decorators() -> None:
     add(2, 3)
 
     # 引数付きデコレータ
+    # times が小さければ func の呼び出しを times 回並べたソースを生成し、ループを展開する
     def repeat(times: int):
         def decorator(func: Callable[..., T]) -> Callable[..., T]:
+            if 0 < times <= 16:
+                src = ("def wrapper(*args, **kwargs):\n"
+                       + "    func(*args, **kwargs)\n" * (times - 1)
+                       + "    return func(*args, **kwargs)\n")
+                namespace: Dict[str, Any] = {"func": func}
+                exec(src, namespace)
+                return wraps(func)(namespace["wrapper"])
+
             @wraps(func)
             def wrapper(*args, **kwargs) -> T:
                 result = None
@@ -101,9 +163,11 @@ def decorators() -> None:
         instances: Dict[type, Any] = {}
         @wraps(cls)
         def get_instance(*args, **kwargs):
-            if cls not in instances:
-                instances[cls] = cls(*args, **kwargs)
-            return instances[cls]
+            # 2 回目以降は get 1 回の探索で返す
+            inst = instances.get(cls)
+            if inst is None:
+                inst = instances[cls] = cls(*args, **kwargs)
+            return inst
         return get_instance
 
     @singleton
@@ -124,27 +188,45 @@ def decorators() -> None:
 def descriptors() -> None:
     print("--- ディスクリプタ ---")
 
+    # 値はオーナー側の _<name> スロットに置き、__dict__ を経由しない。
+    # _<name> を持てないオーナー (__slots__ に無く __dict__ も無い) のときだけ
+    # ディスクリプタ側の WeakKeyDictionary に置く
     class Validator:
+        __slots__ = ("min_value", "max_value", "name", "_priv", "_values")
+
         def __init__(self, min_value: float, max_value: float) -> None:
             self.min_value = min_value
             self.max_value = max_value
 
         def __set_name__(self, owner: type, name: str) -> None:
             self.name = name
+            self._priv = "_" + name
+            if hasattr(owner, self._priv) or owner.__dictoffset__:
+                self._values = None
+            else:
+                self._values = WeakKeyDictionary()
 
         def __get__(self, obj: Any, objtype: type) -> Any:
             if obj is None:
                 return self
-            return obj.__dict__.get(self.name)
+            values = self._values
+            if values is not None:
+                return values.get(obj)
+            return getattr(obj, self._priv, None)
 
         def __set__(self, obj: Any, value: float) -> None:
             if not self.min_value <= value <= self.max_value:
                 raise ValueError(
                     f"{self.name} must be between {self.min_value} and {self.max_value}"
                 )
-            obj.__dict__[self.name] = value
+            values = self._values
+            if values is not None:
+                values[obj] = value
+            else:
+                setattr(obj, self._priv, value)
 
     class Product:
+        __slots__ = ("name", "_price", "_quantity")
         price = Validator(0, 10000)
         quantity = Validator(0, 1000)
 
@@ -161,6 +243,15 @@ def descriptors() -> None:
     except ValueError as e:
         print(f"ValueError: {e}")
 
+    # 弱参照だけを持つオーナー
+    class Gadget:
+        __slots__ = ("__weakref__",)
+        price = Validator(0, 100)
+
+    gadget = Gadget()
+    gadget.price = 5
+    print(f"Gadget (WeakKeyDictionary): ${gadget.price}")
+
     print()
 
 
@@ -188,14 +279,19 @@ def metaclasses() -> None:
     # 属性の自動登録
     print("\n自動登録メタクラス:")
 
+    # クラス生成時は list への追記だけにし、名前で引く dict は必要になったときに作る
     class RegisterMeta(type):
-        registry: Dict[str, type] = {}
+        registry: List[Tuple[str, type]] = []
 
         def __new__(mcs, name, bases, namespace):
             cls = super().__new__(mcs, name, bases, namespace)
-            mcs.registry[name] = cls
+            mcs.registry.append((name, cls))
             return cls
 
+        @classmethod
+        def as_dict(mcs) -> Dict[str, type]:
+            return dict(mcs.registry)
+
     class Base(metaclass=RegisterMeta):
         pass
 
@@ -205,7 +301,8 @@ def metaclasses() -> None:
     class ChildB(Base):
         pass
 
-    print(f"Registry: {list(RegisterMeta.registry.keys())}")
+    print(f"Registry: {[name for name, _ in RegisterMeta.registry]}")
+    assert RegisterMeta.as_dict()["ChildA"] is ChildA
 
     print()
 
@@ -215,23 +312,28 @@ def dynamic_attributes() -> None:
     print("--- 動的属性アクセス ---")
 
     class DynamicObject:
+        __slots__ = ("_data", "_get")
+
         def __init__(self) -> None:
             self._data: Dict[str, Any] = {}
+            # 読み出しのたびに _data.get を引かないよう束縛メソッドを持っておく
+            self._get = self._data.get
 
         def __getattr__(self, name: str) -> Any:
             if name.startswith("_"):
                 raise AttributeError(name)
-            return self._data.get(name, f"<undefined: {name}>")
+            return self._get(name, f"<undefined: {name}>")
 
         def __setattr__(self, name: str, value: Any) -> None:
+            # super() の解決を避けて object のスロット書き込みを直接呼ぶ
             if name.startswith("_"):
-                super().__setattr__(name, value)
+                object.__setattr__(self, name, value)
             else:
                 self._data[name] = value
 
         def __delattr__(self, name: str) -> None:
-            if name in self._data:
-                del self._data[name]
+            # in + del の 2 回のハッシュ探索を pop 1 回にまとめる
+            self._data.pop(name, None)
 
     obj = DynamicObject()
     obj.foo = "bar"
@@ -240,6 +342,9 @@ def dynamic_attributes() -> None:
     print(f"obj.foo: {obj.foo}")
     print(f"obj.count: {obj.count}")
     print(f"obj.undefined: {obj.undefined}")
+    del obj.count
+    del obj.missing
+    assert obj.count == "<undefined: count>"
 
     print()
 
@@ -249,6 +354,8 @@ def callable_objects() -> None:
     print("--- callable オブジェクト ---")
 
     class Counter:
+        __slots__ = ("count",)
+
         def __init__(self) -> None:
             self.count = 0
 
@@ -262,11 +369,33 @@ def callable_objects() -> None:
     print(f"counter(): {counter()}")
 
     # デコレータとして
+    # times が小さければ try/except を times 個並べたソースを生成してループを展開する。
+    # 生成した wrapper は (func, times) ごとにキャッシュする
+    @lru_cache(maxsize=None)
+    def unrolled_retry(func: Callable[..., T], times: int) -> Callable[..., T]:
+        lines = ["def wrapper(*args, **kwargs):"]
+        for i in range(1, times + 1):
+            lines += [
+                "    try:",
+                "        return func(*args, **kwargs)",
+                "    except Exception as e:",
+                f'        print(f"  Attempt {i} failed: {{e}}")',
+            ]
+        lines.append("        raise")
+        namespace: Dict[str, Any] = {"func": func}
+        exec("\n".join(lines), namespace)
+        return wraps(func)(namespace["wrapper"])
+
     class Retry:
+        __slots__ = ("times",)
+
         def __init__(self, times: int) -> None:
             self.times = times
 
         def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
+            if 0 < self.times <= 16:
+                return unrolled_retry(func, self.times)
+
             @wraps(func)
             def wrapper(*args, **kwargs) -> T:
                 for i in range(self.times):
@@ -281,8 +410,7 @@ def callable_objects() -> None:
 
     @Retry(3)
     def flaky_function() -> str:
-        import random
-        if random.random() < 0.7:
+        if _rand() < 0.7:
             raise ValueError("Random failure")
         return "Success!"
 
@@ -293,6 +421,17 @@ def callable_objects() -> None:
     except ValueError:
         print("  All attempts failed")
 
+    calls: List[int] = []
+
+    def fail_twice() -> int:
+        calls.append(1)
+        if len(calls) < 3:
+            raise ValueError(f"failure {len(calls)}")
+        return len(calls)
+
+    print("\n@Retry(3) (2 回失敗してから成功):")
+    print(f"  Result: {Retry(3)(fail_twice)()}")
+
     print()
 
 
@@ -300,22 +439,18 @@ def callable_objects() -> None:
 def exec_and_eval() -> None:
     print("--- exec と eval ---")
 
-    # eval: 式を評価
-    result = eval("2 + 3 * 4")
+    # eval: 式を評価 (コンパイル済みのコードオブジェクトを渡すと字句解析・構文解析を省ける)
+    result = eval(_EXPR_ARITH)
     print(f"eval('2 + 3 * 4'): {result}")
 
     # 変数を含む式
     x = 10
-    result = eval("x * 2", {"x": x})
+    result = eval(_EXPR_DOUBLE, {"x": x})
     print(f"eval('x * 2'): {result}")
 
     # exec: 文を実行
-    code = """
-def greet(name):
-    return f"Hello, {name}!"
-"""
     namespace: Dict[str, Any] = {}
-    exec(code, namespace)
+    exec(_CODE_GREET, namespace)
     print(f"exec defined greet: {namespace['greet']('World')}")
 
     # 注意: eval/exec はセキュリティリスク
@@ -330,6 +465,8 @@ def new_method() -> None:
 
     # 不変オブジェクトの作成
     class ImmutablePoint:
+        __slots__ = ("x", "y")
+
         def __new__(cls, x: float, y: float):
             instance = super().__new__(cls)
             object.__setattr__(instance, "x", x)
@@ -351,13 +488,24 @@ def new_method() -> None:
 
     # インスタンスの再利用 (Flyweight)
     class CachedInstance:
+        # _cache はクラス属性なので __slots__ と併用できる
+        __slots__ = ("value",)
         _cache: Dict[tuple, "CachedInstance"] = {}
 
+        # クラスごとに自分の _cache を持つので、キーは args だけでよい
+        @classmethod
+        def _get_cache(cls) -> Dict[tuple, "CachedInstance"]:
+            cache = cls.__dict__.get("_cache")
+            if cache is None:
+                cache = cls._cache = {}
+            return cache
+
         def __new__(cls, *args):
-            key = (cls, args)
-            if key not in cls._cache:
-                cls._cache[key] = super().__new__(cls)
-            return cls._cache[key]
+            cache = cls._get_cache()
+            inst = cache.get(args)
+            if inst is None:
+                inst = cache[args] = super().__new__(cls)
+            return inst
 
         def __init__(self, value: int) -> None:
             self.value = value
@@ -369,6 +517,11 @@ def new_method() -> None:
     print(f"a is b: {a is b}")
     print(f"a is c: {a is c}")
 
+    class CachedChild(CachedInstance):
+        __slots__ = ()
+
+    assert CachedChild(1) is not a and CachedChild(1) is CachedChild(1)
+
     print()
 
 
@@ -381,17 +534,17 @@ def inspect_module() -> None:
         return f"{a}: {b}"
 
     # シグネチャ
-    sig = inspect.signature(example_function)
+    sig = _signature(example_function)
     print(f"Signature: {sig}")
     for name, param in sig.parameters.items():
         print(f"  {name}: {param.annotation}, default={param.default}")
 
     # ソースコード
-    source = inspect.getsource(example_function)
+    source = _getsource(example_function.__code__)
     print(f"\nSource:\n{source}")
 
     # ドキュメント
-    print(f"Docstring: {inspect.getdoc(example_function)}")
+    print(f"Docstring: {_getdoc(example_function)}")
 
     print()
 
@@ -5,9 +5,41 @@ Python は全てがオブジェクト。
 クラス、継承、多重継承、メタクラスをサポート。
 """
 
+import math
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Optional, ClassVar, Protocol
+from functools import lru_cache
+from typing import List, Optional, ClassVar, Protocol, Sequence, Tuple
+
+# Numba はオプション依存 (NumPy が前提)。無ければ純 Python のループで計算する
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+
+def _distances(x: float, y: float, xs, ys, out) -> None:
+    for i in range(len(xs)):
+        out[i] = ((x - xs[i]) ** 2 + (y - ys[i]) ** 2) ** 0.5
+
+
+if njit is not None:
+    # 1 点ずつの distance はディスパッチ (約 1 µs) の方が重いので JIT しない。
+    # まとめて計算する distances_to だけをコンパイル済みループに回す
+    _distances = njit(cache=True)(_distances)
+
+# メソッド内での import と math.pi の属性参照を毎回しない
+_PI = math.pi
+
+
+# 同じ文字列の split + int 変換を繰り返さない。Date は可変なので結果はタプルで持ち、
+# インスタンスは毎回作る
+@lru_cache(maxsize=1024)
+def _parse_date(date_str: str) -> Tuple[int, int, int]:
+    year, month, day = map(int, date_str.split("-"))
+    return year, month, day
 
 print("=== OOP Demo ===\n")
 
@@ -62,8 +94,9 @@ def properties() -> None:
 
         @property
         def area(self) -> float:
-            import math
-            return math.pi * self._radius ** 2
+            # ** は PyNumber_Power 経由なので掛け算で書く
+            r = self._radius
+            return _PI * r * r
 
     circle = Circle(5)
     print(f"radius: {circle.radius}")
@@ -92,8 +125,7 @@ def class_and_static_methods() -> None:
 
         @classmethod
         def from_string(cls, date_str: str) -> "Date":
-            year, month, day = map(int, date_str.split("-"))
-            return cls(year, month, day)
+            return cls(*_parse_date(date_str))
 
         @staticmethod
         def is_valid_date(year: int, month: int, day: int) -> bool:
@@ -221,12 +253,11 @@ def abstract_classes() -> None:
             self.radius = radius
 
         def area(self) -> float:
-            import math
-            return math.pi * self.radius ** 2
+            r = self.radius
+            return _PI * r * r
 
         def perimeter(self) -> float:
-            import math
-            return 2 * math.pi * self.radius
+            return 2 * _PI * self.radius
 
     shapes: List[Shape] = [Rectangle(10, 5), Circle(7)]
     for shape in shapes:
@@ -277,11 +308,23 @@ def dataclasses_demo() -> None:
         def distance(self, other: "Point") -> float:
             return ((self.x - other.x)**2 + (self.y - other.y)**2) ** 0.5
 
+        # 多数の点との距離は座標の配列で受け取り、1 回の呼び出しで計算する
+        def distances_to(self, xs: Sequence[float], ys: Sequence[float]) -> List[float]:
+            if njit is not None:
+                out = np.empty(len(xs))
+                _distances(self.x, self.y, np.asarray(xs, dtype=np.float64),
+                           np.asarray(ys, dtype=np.float64), out)
+                return out.tolist()
+            out = [0.0] * len(xs)
+            _distances(self.x, self.y, xs, ys, out)
+            return out
+
     p1 = Point(0, 0)
     p2 = Point(3, 4)
     print(f"p1: {p1}")
     print(f"p2: {p2}")
     print(f"distance: {p1.distance(p2)}")
+    print(f"distances_to: {p1.distances_to([3, 6], [4, 8])} (Numba: {njit is not None})")
     print(f"p1 == Point(0, 0): {p1 == Point(0, 0)}")
 
     # 不変データクラス
@@ -304,6 +347,51 @@ def dataclasses_demo() -> None:
     c.items.append("item1")
     print(f"default_factory: {c}")
 
+    # 大量に作る場合は属性ごとの list に詰め (SoA)、インスタンスは整数ハンドルで指す。
+    # 1 件あたりのオブジェクトが減り、名前や中身の走査は連続した list を舐めるだけになる。
+    # 代わりに途中の削除は全 list を揃えて詰め直す必要がある
+    class ContainerStore:
+        __slots__ = ("names", "items")
+
+        def __init__(self) -> None:
+            self.names: List[str] = []
+            self.items: List[List[str]] = []
+
+        def add(self, name: str) -> int:
+            self.names.append(name)
+            self.items.append([])
+            return len(self.names) - 1
+
+        def __getitem__(self, idx: int) -> "ContainerView":
+            return ContainerView(self, idx)
+
+    # Container と同じ属性で読めるビュー
+    class ContainerView:
+        __slots__ = ("_store", "_idx")
+
+        def __init__(self, store: ContainerStore, idx: int) -> None:
+            self._store = store
+            self._idx = idx
+
+        @property
+        def name(self) -> str:
+            return self._store.names[self._idx]
+
+        @property
+        def items(self) -> List[str]:
+            return self._store.items[self._idx]
+
+        def __repr__(self) -> str:
+            return f"Container(name={self.name!r}, items={self.items!r})"
+
+    store = ContainerStore()
+    for name in ("box", "bag", "crate"):
+        store.add(name)
+    store[0].items.append("item1")
+    store[2].items.append("item2")
+    print(f"ContainerStore[0]: {store[0]}")
+    print(f"non-empty: {[n for n, it in zip(store.names, store.items) if it]}")
+
     print()
 
 
@@ -311,22 +399,35 @@ def dataclasses_demo() -> None:
 def special_methods() -> None:
     print("--- 特殊メソッド ---")
 
+    # __slots__ で __dict__ を持たせず、演算結果は __new__ で作って __init__ の呼び出しを省く
     class Vector:
+        __slots__ = ("x", "y")
+
         def __init__(self, x: float, y: float) -> None:
             self.x = x
             self.y = y
 
         def __add__(self, other: "Vector") -> "Vector":
-            return Vector(self.x + other.x, self.y + other.y)
+            v = Vector.__new__(Vector)
+            v.x = self.x + other.x
+            v.y = self.y + other.y
+            return v
 
         def __sub__(self, other: "Vector") -> "Vector":
-            return Vector(self.x - other.x, self.y - other.y)
+            v = Vector.__new__(Vector)
+            v.x = self.x - other.x
+            v.y = self.y - other.y
+            return v
 
         def __mul__(self, scalar: float) -> "Vector":
-            return Vector(self.x * scalar, self.y * scalar)
+            v = Vector.__new__(Vector)
+            v.x = self.x * scalar
+            v.y = self.y * scalar
+            return v
 
+        # isinstance の MRO 走査を避けて型を直接比べる。サブクラスは __eq__ を定義し直すこと
         def __eq__(self, other: object) -> bool:
-            if not isinstance(other, Vector):
+            if type(other) is not Vector:
                 return NotImplemented
             return self.x == other.x and self.y == other.y
 
@@ -334,11 +435,7 @@ def special_methods() -> None:
             return 2
 
         def __getitem__(self, index: int) -> float:
-            if index == 0:
-                return self.x
-            elif index == 1:
-                return self.y
-            raise IndexError
+            return (self.x, self.y)[index]
 
         def __iter__(self):
             yield self.x
@@ -401,9 +498,12 @@ def metaclass_demo() -> None:
         _instances: dict = {}
 
         def __call__(cls, *args, **kwargs):
-            if cls not in cls._instances:
-                cls._instances[cls] = super().__call__(*args, **kwargs)
-            return cls._instances[cls]
+            # 2 回目以降は get 1 回の探索で返す
+            instances = cls._instances
+            inst = instances.get(cls)
+            if inst is None:
+                inst = instances[cls] = super().__call__(*args, **kwargs)
+            return inst
 
     class Singleton(metaclass=SingletonMeta):
         def __init__(self, value: int) -> None:
@@ -11,6 +11,7 @@ from typing import (
     Literal, Protocol, Final, ClassVar
 )
 from dataclasses import dataclass
+from functools import lru_cache
 
 print("=== Type System Demo ===\n")
 
@@ -193,6 +194,17 @@ def protocols() -> None:
     render(Circle(5))
     render(Rectangle(10, 20))
 
+    # 実行時チェック: runtime_checkable な Protocol の isinstance は毎回メソッドを調べるので、
+    # 繰り返し同じ型を判定するなら型をキーにキャッシュする
+    @lru_cache(maxsize=None)
+    def is_drawable(tp: type) -> bool:
+        return callable(getattr(tp, "draw", None))
+
+    items: List[Any] = [Circle(1), "text", Rectangle(2, 3), Circle(4)]
+    drawn = [x.draw() for x in items if is_drawable(type(x))]
+    print(f"  drawable only: {drawn}")
+    assert is_drawable(Circle) and not is_drawable(str)
+
     print()
 
 
@@ -294,13 +306,16 @@ def type_guards() -> None:
     print(f"isinstance guard: {process(42)}, {process('hello')}")
 
     # カスタム型ガード
+    # 要素ごとの isinstance ではなく型の同一性で比べる (str のサブクラスは弾く)
     def is_string_list(val: List[Any]) -> TypeGuard[List[str]]:
-        return all(isinstance(x, str) for x in val)
+        t = str
+        return all(type(x) is t for x in val)
 
     items: List[Any] = ["a", "b", "c"]
     if is_string_list(items):
         # ここでは items は List[str]
         print(f"TypeGuard: {[s.upper() for s in items]}")
+    assert not is_string_list(["a", 1])
 
     print()
 